@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""Scaling study: sweep one dimension of the query or the input at a time,
+fit how compile time, feed time and peak memory grow with it, and flag the
+dimensions growing faster than expected.
+
+Query shapes come from TestcaseGenerator in generate.py. Power-law
+dimensions are fitted as y ~ x^k (slope in log-log), exponential ones as
+y ~ b^x (base of the slope in log-linear).
+"""
+import argparse
+import json
+import math
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from itertools import islice
+from pathlib import Path
+from time import perf_counter_ns
+
+from generate import TestcaseGenerator
+
+from reflinkcep.ast import Query
+from reflinkcep.bench import synthetic_stream
+from reflinkcep.compile import compile
+
+METRICS = ("compile_s", "feed_s", "memory_bytes")
+TOLERANCE = 0.3  # on the fitted exponent, or on the base of exponentials
+REPEATS = 3
+DEFAULT_LENGTH = 2000
+
+
+@dataclass
+class Dimension:
+    name: str
+    values: list[int]
+    model: str  # "power" or "exp"
+    # metric -> expected exponent (power) or base (exp)
+    expected: dict[str, float]
+
+
+DIMENSIONS = [
+    Dimension(
+        "length",
+        [1000, 2000, 4000, 8000, 16000],
+        "power",
+        {"compile_s": 0, "feed_s": 1, "memory_bytes": 0},
+    ),
+    Dimension(
+        "m",
+        [2, 4, 8, 16, 32],
+        "power",
+        {"compile_s": 1, "feed_s": 1, "memory_bytes": 1},
+    ),
+    Dimension(
+        "width",
+        [2, 4, 8, 16, 32],
+        "power",
+        {"compile_s": 0, "feed_s": 0, "memory_bytes": 1},
+    ),
+    Dimension(
+        "depth",
+        [1, 2, 3, 4],
+        "exp",
+        {"compile_s": 2, "feed_s": 2, "memory_bytes": 2},
+    ),
+    Dimension(
+        "queries",
+        [1, 2, 4, 8, 16],
+        "power",
+        {"compile_s": 1, "feed_s": 1, "memory_bytes": 1},
+    ),
+]
+
+
+class Shapes:
+    """Queries of the scaling study, built from the generator's shapes: a
+    single-event pattern followed strictly by a strict looping pattern"""
+
+    def __init__(self) -> None:
+        self.generator = TestcaseGenerator(writer=None)
+
+    def lpat(self, m: int) -> dict:
+        for lpat in self.generator.iter_lpat():
+            loop = lpat["loop"]
+            if lpat["type"] == "lpat" and loop["contiguity"] == "strict":
+                if "variables" not in lpat:
+                    return dict(lpat, loop=dict(loop, **{"from": 1, "to": m}))
+
+    def query(self, m: int = 3, width: int = 3, depth: int = 0) -> Query:
+        child = self.lpat(m)
+        for _ in range(depth):
+            looping = {"type": "gpat-times", "loop": {"from": 1, "to": 2}}
+            child = self.generator.ast_group(child, looping)
+        ast = self.generator.ast_combine(self.generator.gen_spat(), child, "strict")
+        query = Query.from_dict(self.generator.gen_query(ast)[0])
+        attrs = query.context["schema"]["e"]
+        attrs.extend("a{}".format(i) for i in range(width - len(attrs)))
+        query.from_source = "scaling"
+        return query
+
+    def point(self, dimension: str, value: int) -> tuple[list[Query], int]:
+        """Queries and stream length at one point of a sweep"""
+        if dimension == "length":
+            return [self.query()], value
+        if dimension == "m":
+            return [self.query(m=value)], DEFAULT_LENGTH
+        if dimension == "width":
+            return [self.query(width=value)], DEFAULT_LENGTH
+        if dimension == "depth":
+            return [self.query(depth=value)], DEFAULT_LENGTH
+        if dimension == "queries":
+            return [self.query() for _ in range(value)], DEFAULT_LENGTH
+        raise ValueError("Unknown dimension {}".format(dimension))
+
+
+def measure(queries: list[Query], length: int) -> dict[str, float]:
+    """Best of REPEATS compile and feed times, and the peak traced memory of
+    a separate run, so that tracing does not slow the timed ones"""
+    events = list(islice(synthetic_stream(queries[0]), length))
+    compile_s = feed_s = math.inf
+    for _ in range(REPEATS):
+        start = perf_counter_ns()
+        executors = [compile(query) for query in queries]
+        compiled = perf_counter_ns()
+        for executor in executors:
+            executor.reset()
+        for event in events:
+            for executor in executors:
+                executor.feed(event)
+        fed = perf_counter_ns()
+        compile_s = min(compile_s, (compiled - start) / 1e9)
+        feed_s = min(feed_s, (fed - compiled) / 1e9)
+
+    tracemalloc.start()
+    try:
+        executors = [compile(query) for query in queries]
+        for executor in executors:
+            executor.reset()
+        for event in events:
+            for executor in executors:
+                executor.feed(event)
+        _, memory_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"compile_s": compile_s, "feed_s": feed_s, "memory_bytes": memory_bytes}
+
+
+def fit(xs: list[float], ys: list[float], model: str) -> float:
+    """Least squares slope of log(y) against log(x) for power laws, or the
+    base exp(slope) of log(y) against x for exponentials"""
+    us = [math.log(x) for x in xs] if model == "power" else list(xs)
+    vs = [math.log(max(y, 1e-12)) for y in ys]
+    mu, mv = sum(us) / len(us), sum(vs) / len(vs)
+    slope = sum((u - mu) * (v - mv) for u, v in zip(us, vs)) / sum(
+        (u - mu) ** 2 for u in us
+    )
+    return slope if model == "power" else math.exp(slope)
+
+
+@dataclass
+class Sweep:
+    dimension: str
+    model: str
+    values: list[int]
+    measurements: list[dict[str, float]] = field(default_factory=list)
+    fitted: dict[str, float] = field(default_factory=dict)
+    expected: dict[str, float] = field(default_factory=dict)
+    flagged: list[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        lines = ["{} ({}):".format(self.dimension, self.model)]
+        for metric in METRICS:
+            lines.append(
+                "  {:<13} fitted {:5.2f}  expected <= {:<4g} {}".format(
+                    metric,
+                    self.fitted[metric],
+                    self.expected[metric],
+                    "WORSE THAN EXPECTED" if metric in self.flagged else "",
+                ).rstrip()
+            )
+        return "\n".join(lines)
+
+
+def sweep(dimension: Dimension, shapes: Shapes) -> Sweep:
+    result = Sweep(
+        dimension.name, dimension.model, dimension.values, expected=dimension.expected
+    )
+    for value in dimension.values:
+        result.measurements.append(measure(*shapes.point(dimension.name, value)))
+    for metric in METRICS:
+        ys = [m[metric] for m in result.measurements]
+        fitted = result.fitted[metric] = fit(dimension.values, ys, dimension.model)
+        if fitted > dimension.expected[metric] + TOLERANCE:
+            result.flagged.append(metric)
+    return result
+
+
+def main():
+    names = [d.name for d in DIMENSIONS]
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("dimensions", nargs="*", help="any of {}".format(names))
+    parser.add_argument("-o", "--output", type=Path, help="write the sweeps as JSON")
+    args = parser.parse_args()
+    for name in args.dimensions:
+        if name not in names:
+            parser.error("unknown dimension {}".format(name))
+
+    shapes = Shapes()
+    sweeps = []
+    for dimension in DIMENSIONS:
+        if dimension.name in (args.dimensions or names):
+            sweeps.append(sweep(dimension, shapes))
+            print(sweeps[-1], flush=True)
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump([asdict(s) for s in sweeps], f, indent=2)
+    if any(s.flagged for s in sweeps):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
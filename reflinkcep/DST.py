@@ -1,13 +1,17 @@
+import builtins
+import sys
+from array import array
 from copy import deepcopy
-from dataclasses import dataclass
-from logging import getLogger
+from dataclasses import dataclass, field
 from tarfile import is_tarfile
-from typing import Callable, Iterable
+from types import CodeType
+from typing import TYPE_CHECKING, Callable, Iterable
 
 from reflinkcep.defs import value_t
 from reflinkcep.event import Event, EventAttrMap, Stream, EventStream
 
-logger = getLogger(__name__)
+if TYPE_CHECKING:
+    from reflinkcep.stats import ExecutorStats
 
 Val = value_t
 Set = set
@@ -22,6 +26,24 @@ Context = Func[StreamVariable, EventStream]
 
 TrueCondition = {"expr": "True"}
 
+# (filename, expr) -> code object, shared by every DST compiled in the process
+_code_cache: dict[tuple[str, str], CodeType] = {}
+
+
+def compile_expr(expr: FExp, filename: str) -> CodeType:
+    """Compile an expression once, reusing the cached code object afterwards"""
+    key = (filename, expr)
+    code = _code_cache.get(key)
+    if code is None:
+        code = _code_cache[key] = compile(expr, filename=filename, mode="eval")
+    return code
+
+
+def data_env(values: Func[DataVariable, Val]) -> DataEnv:
+    """Data environment of configurations: the values, and no builtins for
+    conditions, so that it is their globals dict as is"""
+    return {**values, "__builtins__": None}
+
 
 def func_merge(f1: Func, f2: Func | None) -> Func:
     f = deepcopy(f1)
@@ -31,22 +53,15 @@ def func_merge(f1: Func, f2: Func | None) -> Func:
 
 
 class State:
-    _internal_counter: int = 0
-
-    @classmethod
-    def _get_counter(cls) -> None:
-        ret = cls._internal_counter
-        cls._step()
-        return ret
-
-    @classmethod
-    def _step(cls) -> None:
-        cls._internal_counter += 1
-
     def __init__(self, name: str, out: Func[str, str] = None) -> None:
-        self.name = "{}:{}".format(name, self._get_counter())
+        self.label = name
+        self.id: int = None  # dense per-DST id, assigned when the DST is built
         self.out = out
 
+    @property
+    def name(self) -> str:
+        return "{}:{}".format(self.label, self.id)
+
     def extend_output(self, out: Func[str, str]) -> None:
         assert out is not None, "out to extend is None"
         self.out = func_merge(out, self.out)
@@ -58,18 +73,20 @@ class State:
         return "State({},{})".format(self.name, 0 if self.out is None else 1)
 
 
-@dataclass
+@dataclass(slots=True)
 class Configuration:
+    """A partial match. Records are never mutated once created, so eta, ctx
+    and the streams in ctx are shared between a configuration and its
+    successors."""
+
     q: State
     eta: DataEnv
     ctx: Context
     last_take: bool = False
-    reverse_eps_closure: set[str] = None
-
-    def __post_init__(self):
-        if self.reverse_eps_closure is None:
-            self.reverse_eps_closure = set()
-        self.reverse_eps_closure.add(self.q.name)
+    # bitmask of state ids reached by epsilon transitions since the last event
+    eps_mask: int = 0
+    # stream position of the event this partial match started at
+    start: int = 0
 
     def get_state(self) -> State:
         return self.q
@@ -78,15 +95,17 @@ class Configuration:
         return self.last_take
 
     def once_epsilon_from(self, q: State) -> bool:
-        return q.name in self.reverse_eps_closure
+        return (self.eps_mask >> q.id) & 1 == 1
 
 
 class ConditionEvaluator:
     def __init__(self, cndt: Condition) -> None:
-        self.obj = compile(cndt["expr"], filename="<condition>", mode="eval")
+        self.obj = compile_expr(cndt["expr"], "<condition>")
 
     def eval(self, env: DataEnv, attrs: EventAttrMap) -> bool:
-        return eval(self.obj, {**env, **attrs, "__builtins__": None})
+        """env is a `data_env`, used as globals without a copy; attrs are
+        looked up as locals, so any mapping works too"""
+        return eval(self.obj, env, attrs)
 
 
 @dataclass
@@ -96,8 +115,12 @@ class Predicte:  # predicate
     ANY_TYPE = "*"
 
     def __post_init__(self):
+        if self.ev_type is not None:
+            self.ev_type = sys.intern(self.ev_type)
         self.evaluator = ConditionEvaluator(self.cndt)
         self.epsilon = self.ev_type is None
+        # guards such as ignore edges on other event types need no eval
+        self.trivial = self.cndt["expr"] == TrueCondition["expr"]
 
     @classmethod
     def epsilon(cls) -> "Predicte":
@@ -113,7 +136,11 @@ class Predicte:  # predicate
             {"expr": f"({self.cndt['expr']}) and (not ({cndtp['expr']}))"},
         )
 
-    def evaluate(self, conf: Configuration, event: Event) -> bool:
+    def evaluate(
+        self, conf: Configuration, event: Event, stats: "ExecutorStats" = None
+    ) -> bool:
+        """If the guard holds for (conf, event), counting the conditions it
+        evals into stats"""
         if (
             event is not None
             and self.ev_type != None
@@ -121,7 +148,11 @@ class Predicte:  # predicate
             and self.ev_type != event.type
         ):
             return False
+        if self.trivial:
+            return True
 
+        if stats is not None:
+            stats.predicate_evaluations += 1
         attrs = {} if event is None else event.attrs
         return self.evaluator.eval(conf.eta, attrs)
 
@@ -132,15 +163,20 @@ class DataUpdate:
 
     def __post_init__(self):
         self.compiled = Func(
-            (key, compile(expr, filename="<data_update>", mode="eval"))
+            (key, compile_expr(expr, "<data_update>"))
             for key, expr in self.alpha.items()
         )
 
     def update(self, eta: Func, event: Event) -> Func:
+        if not self.compiled:
+            return eta
         attrs = {} if event is None else event.get_attrs()
-        neweta = deepcopy(eta)
+        # every expression reads the old eta, attributes shadowing it
+        scope = eta.copy()
+        scope["__builtins__"] = builtins
+        neweta = eta.copy()
         for var, expr in self.compiled.items():
-            neweta[var] = eval(expr, {**eta, **attrs})
+            neweta[var] = eval(expr, scope, attrs)
         return neweta
 
     @staticmethod
@@ -158,11 +194,10 @@ class EventStreamUpdate:
             return ctx
         assert event is not None, "Trying to take epsilon"
 
-        # Take the event
-        newctx = deepcopy(ctx)
-        if not self.sink in newctx:
-            newctx[self.sink] = Stream()
-        newctx[self.sink].append(event)
+        # Take the event, streams are copied on write
+        newctx = ctx.copy()
+        stream = newctx.get(self.sink)
+        newctx[self.sink] = Stream([event]) if stream is None else stream + [event]
         return newctx
 
     def is_id(self):
@@ -180,6 +215,19 @@ class Transition:
     q2: State
     alpha: DataUpdate
     beta: EventStreamUpdate
+    # path of the AST node this transition was compiled from, see ast_at
+    origin: str = field(default=None, repr=False, compare=False)
+    id: int = field(default=None, repr=False, compare=False)  # index in DST.edges
+
+    def __post_init__(self) -> None:
+        # ignore self-loop leaving data and context untouched, e.g. q_ignore
+        # of a relaxed loop: a configuration waiting there is carried over as is
+        self.idle_loop = (
+            self.q1 is self.q2
+            and not self.is_epsilon()
+            and not self.is_take()
+            and not self.alpha.alpha
+        )
 
     def get_predict(self) -> Predicte:
         return self.p
@@ -187,37 +235,45 @@ class Transition:
     def update_predict(self, newpred: Predicte) -> None:
         self.p = newpred
 
-    def predict(self, conf: Configuration, event: Event) -> bool:
+    def predict(
+        self, conf: Configuration, event: Event, stats: "ExecutorStats" = None
+    ) -> bool:
         """If this edge can go with (conf, event)"""
 
         # each state can be reached by epsilon transition only once
         if self.is_epsilon() and conf.once_epsilon_from(self.q2):
             return False
 
-        return self.p.evaluate(conf, event)
-
-    def advance(self, conf: Configuration, event: Event) -> Configuration:
-        """Calculate next configuration"""
+        return self.p.evaluate(conf, event, stats)
 
-        # If this is epsilon transition, just follow the privious flag
-        is_last_take = conf.last_take if self.is_epsilon() else self.is_take()
+    def advance(
+        self, conf: Configuration, event: Event, taken: Event | int = None
+    ) -> Configuration:
+        """Calculate next configuration, appending `taken` (by default the
+        event itself) to the context if this edge takes the event"""
 
-        # If this is not a epsilon transition, reset the reverse epsilon closure
-        rev_eps_closure = (
-            conf.reverse_eps_closure.copy() if self.is_epsilon() else set()
-        )
+        if (
+            self.idle_loop
+            and not conf.last_take
+            and conf.eps_mask == 1 << conf.q.id
+        ):
+            return conf
 
-        if self.is_take():
-            logger.debug("Taking %s", event)
-        elif not self.is_epsilon:
-            logger.debug("Ignoring %s", event)
+        if self.is_epsilon():
+            # follow the previous flag and extend the reverse epsilon closure
+            is_last_take = conf.last_take
+            eps_mask = conf.eps_mask | (1 << self.q2.id)
+        else:
+            is_last_take = self.is_take()
+            eps_mask = 1 << self.q2.id
 
         return Configuration(
             self.q2,
             self.alpha.update(conf.eta, event),
-            self.beta.update(conf.ctx, event),
+            self.beta.update(conf.ctx, event if taken is None else taken),
             is_last_take,
-            reverse_eps_closure=rev_eps_closure,
+            eps_mask,
+            conf.start,
         )
 
     def is_epsilon(self) -> bool:
@@ -248,40 +304,110 @@ class DST:
     Delta: TransitionCollection[Transition]
 
     def __post_init__(self) -> None:
-        self.edge_map: dict[str, TransitionCollection[Transition]] = {}
+        out_edges: dict[State, TransitionCollection[Transition]] = {}
         for edge in self.Delta:
-            q1 = edge.q1.name
-            if not q1 in self.edge_map:
-                self.edge_map[q1] = []
-            self.edge_map[q1].append(edge)
+            out_edges.setdefault(edge.q1, []).append(edge)
+
+        # number states breadth-first from q0, following edges in Delta order,
+        # so that compiling the same query twice yields identical automata
+        self.states: list[State] = [self.q0]
+        seen = {self.q0}
+        for q in self.states:
+            for edge in out_edges.get(q, ()):
+                if edge.q2 not in seen:
+                    seen.add(edge.q2)
+                    self.states.append(edge.q2)
+        self.states.extend(sorted(self.Q - seen, key=lambda q: q.label))
+        for i, q in enumerate(self.states):
+            q.id = i
+
+        # flat transition table: edges[edge_offsets[q.id]:edge_offsets[q.id + 1]]
+        # are the edges leaving q
+        self.edges: TransitionCollection[Transition] = TransitionCollection()
+        self.edge_offsets = array("l", [0])
+        for q in self.states:
+            self.edges.extend(out_edges.get(q, ()))
+            self.edge_offsets.append(len(self.edges))
+        for i, edge in enumerate(self.edges):
+            edge.id = i
+
+        self.env = data_env(self.eta)
+        self.start_edges, self.start_exact = self._first_set()
+        self._start_conf = self.initial_configuration()
+
+    def _first_set(self) -> tuple[TransitionCollection[Transition], bool]:
+        """Edges taking the first event of a match, those leaving the epsilon
+        closure of q0, or None if any event can start one. The guards are
+        exact unless epsilon edges of the closure have guards or data
+        updates, the event type alone is tested then."""
+        closure = [self.q0]
+        exact = True
+        for q in closure:
+            for edge in self.start_from(q):
+                if not edge.is_epsilon():
+                    continue
+                if not edge.p.trivial or edge.alpha.alpha:
+                    exact = False
+                if edge.q2 not in closure:
+                    closure.append(edge.q2)
+        first = TransitionCollection()
+        for q in closure:
+            for edge in self.start_from(q):
+                if edge.is_epsilon():
+                    continue
+                if edge.p.ev_type == Predicte.ANY_TYPE:
+                    return None, exact
+                first.append(edge)
+        return first, exact
+
+    def may_start(
+        self, event: Event, guards: list[list[bool]] = None, row: int = 0
+    ) -> bool:
+        """If event can be the first of a match, guards being the outcomes
+        precomputed for a batch, see Executor.guarded"""
+        if self.start_edges is None:
+            return True
+        for edge in self.start_edges:
+            if edge.p.ev_type != event.type:
+                continue
+            if not self.start_exact:
+                return True
+            guard = None if guards is None else guards[edge.id]
+            if guard is not None:
+                if guard[row]:
+                    return True
+            elif edge.p.evaluate(self._start_conf, event):
+                return True
+        return False
 
     def final_states(self) -> Iterable[State]:
         for state in self.Q:
             if state.out is not None:
                 yield state
 
-    def initial_configuration(self) -> Configuration:
-        return Configuration(self.q0, self.eta, {})
+    def initial_configuration(self, start: int = 0) -> Configuration:
+        return Configuration(self.q0, self.env, {}, False, 1 << self.q0.id, start)
 
     def start_from(self, q: State) -> TransitionCollection[Transition]:
-        qname = q.name
-        if not qname in self.edge_map:
-            return []
-        return self.edge_map[qname]
+        return self.edges[self.edge_offsets[q.id] : self.edge_offsets[q.id + 1]]
 
-    def find_accepted(self, conf: Configuration) -> Configuration:
+    def find_accepted(
+        self, conf: Configuration, stats: "ExecutorStats" = None
+    ) -> Configuration:
         """Find accepted configuration from conf via epsilon-transition"""
-        visited = set()
+        visited = 0
 
         def find_accepted_impl(conf: Configuration) -> Configuration:
+            nonlocal visited
             q = conf.get_state()
-            # visited[q.name] = True
-            visited.add(q.name)
+            visited |= 1 << q.id
             for edge in self.start_from(q):
-                if edge.q2.name in visited:
+                if (visited >> edge.q2.id) & 1:
                     continue
-                if edge.is_epsilon() and edge.predict(conf, None):
+                if edge.is_epsilon() and edge.predict(conf, None, stats):
                     newconf = edge.advance(conf, None)
+                    if stats is not None:
+                        stats.epsilon_expansions += 1
                     if self.accept(newconf):
                         return newconf
                     newtry = find_accepted_impl(newconf)
@@ -312,6 +438,6 @@ class DST:
 
     def _print_trans_map(self) -> str:
         return "\n".join(
-            "{}:[\n{}\n]".format(q, "\n".join(str(e) for e in edges))
-            for q, edges in self.edge_map.items()
+            "{}:[\n{}\n]".format(q, "\n".join(str(e) for e in self.start_from(q)))
+            for q in self.states
         )
@@ -1,4 +1,6 @@
+import re
 from pathlib import Path
+from typing import Iterable
 
 import yaml
 
@@ -12,6 +14,33 @@ EXAMPLE_ASTS_PATH = Path(__file__).parent.parent / "example-patseq-asts"
 
 CONTIGUITY_REPR_MAP = {"strict": "⋅", "relaxed": "∘", "nd-relaxed": "⊙"}
 
+# AST node paths look like "$.left.child[2]", the index being a group iteration
+ROOT_PATH = "$"
+PATH_STEP = re.compile(r"\.(left|right|child)(?:\[(\d+)\])?")
+
+
+def ast_at(ast: AST, path: str) -> AST:
+    """The AST node at `path`, iterations of a group share the child node"""
+    assert path.startswith(ROOT_PATH), "Not an AST path: {}".format(path)
+    pos = len(ROOT_PATH)
+    while pos < len(path):
+        step = PATH_STEP.match(path, pos)
+        if step is None:
+            raise ValueError("Not an AST path: {}".format(path))
+        ast = ast[step.group(1)]
+        pos = step.end()
+    return ast
+
+
+def pattern_nodes(ast: AST, path: str = ROOT_PATH) -> Iterable[tuple[str, AST]]:
+    """The (path, node) of every event pattern (spat, lpat, lpat-inf) in
+    ast, left to right"""
+    if ast["type"] in ("spat", "lpat", "lpat-inf"):
+        yield path, ast
+    for key in ("left", "right", "child"):
+        if key in ast:
+            yield from pattern_nodes(ast[key], "{}.{}".format(path, key))
+
 
 def ast_repr(ast: AST) -> str:
     if ast["type"] == "spat":
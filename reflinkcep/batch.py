@@ -0,0 +1,315 @@
+"""Columnar event batches and vectorized guards.
+
+An `EventBatch` holds a stream as NumPy columns: the type id of every event
+and one int64 column per attribute name of the schema. Guards testing only
+the attributes of the current event (`name == 1 and price < 4`, but not
+`X + price >= 6`) are rewritten into NumPy expressions and evaluated for
+the whole batch at once. The executor then reads their outcome per event
+instead of calling `Predicte.evaluate`.
+
+NumPy is optional: install the `numpy` extra to use batches.
+"""
+
+import ast
+from types import CodeType
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from reflinkcep.event import CompactEvent, Event, EventSchema
+from reflinkcep.eventlog import EventLog, LogLayout
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+if TYPE_CHECKING:
+    from reflinkcep.DST import DST, Predicte
+
+_TRUTH = "__rl_truth"
+_NOT = "__rl_not"
+_INT = "__rl_int"
+_WHERE = "__rl_where"
+
+_BINOPS = (ast.Add, ast.Sub, ast.BitAnd, ast.BitOr, ast.BitXor)
+_UNARYOPS = (ast.USub, ast.UAdd, ast.Invert)
+_CMPOPS = (ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+
+
+class _Vectorizer(ast.NodeTransformer):
+    """Rewrite a condition on scalars into the same condition on columns,
+    raising ValueError on anything without an elementwise equivalent.
+    Operators that can raise on scalars (division, power) are rejected, so
+    that a vectorized guard never hides an error the scalar one would hit,
+    and so is multiplication, which could overflow int64.
+
+    Python bools are ints, so comparisons and `not` yield int64 0/1 columns
+    rather than NumPy bools, whose arithmetic and `~` differ. `and` and `or`
+    yield one of their operands, as in Python."""
+
+    def __init__(self, names: set[str]) -> None:
+        self.names = names
+
+    @staticmethod
+    def _call(func: str, *args: ast.expr) -> ast.Call:
+        return ast.Call(ast.Name(func, ast.Load()), list(args), [])
+
+    @classmethod
+    def _truth(cls, node: ast.expr) -> ast.Call:
+        return cls._call(_TRUTH, node)
+
+    @staticmethod
+    def _reduce(op: ast.operator, nodes: list[ast.expr]) -> ast.expr:
+        result = nodes[0]
+        for node in nodes[1:]:
+            result = ast.BinOp(result, op, node)
+        return result
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        raise ValueError("Cannot vectorize {}".format(type(node).__name__))
+
+    def visit_Expression(self, node: ast.Expression) -> ast.Expression:
+        return ast.Expression(self._truth(self.visit(node.body)))
+
+    def visit_BoolOp(self, node: ast.BoolOp) -> ast.expr:
+        # a and b: b where a holds, else a; a or b: a where a holds, else b
+        values = [self.visit(v) for v in node.values]
+        result = values[-1]
+        for value in reversed(values[:-1]):
+            if isinstance(node.op, ast.And):
+                result = self._call(_WHERE, self._truth(value), result, value)
+            else:
+                result = self._call(_WHERE, self._truth(value), value, result)
+        return result
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.expr:
+        if isinstance(node.op, ast.Not):
+            return self._call(_NOT, self.visit(node.operand))
+        if not isinstance(node.op, _UNARYOPS):
+            return self.generic_visit(node)
+        return ast.UnaryOp(node.op, self.visit(node.operand))
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.expr:
+        if not isinstance(node.op, _BINOPS):
+            return self.generic_visit(node)
+        return ast.BinOp(self.visit(node.left), node.op, self.visit(node.right))
+
+    def visit_Compare(self, node: ast.Compare) -> ast.expr:
+        if not all(isinstance(op, _CMPOPS) for op in node.ops):
+            return self.generic_visit(node)
+        operands = [self.visit(v) for v in [node.left, *node.comparators]]
+        return self._call(
+            _INT,
+            self._reduce(
+                ast.BitAnd(),
+                [
+                    ast.Compare(left, [op], [right])
+                    for left, op, right in zip(operands, node.ops, operands[1:])
+                ],
+            ),
+        )
+
+    def visit_IfExp(self, node: ast.IfExp) -> ast.expr:
+        return self._call(
+            _WHERE,
+            self._truth(self.visit(node.test)),
+            self.visit(node.body),
+            self.visit(node.orelse),
+        )
+
+    def visit_Name(self, node: ast.Name) -> ast.Name:
+        if node.id not in self.names:
+            raise ValueError("{} is not an attribute".format(node.id))
+        return ast.Name(node.id, ast.Load())
+
+    def visit_Constant(self, node: ast.Constant) -> ast.Constant:
+        if type(node.value) not in (bool, int, float):
+            return self.generic_visit(node)
+        return ast.Constant(node.value)
+
+
+def vectorize(expr: str, names: Iterable[str]) -> CodeType:
+    """Compile a condition over the attributes `names` into an expression
+    over their columns, None if it cannot be vectorized"""
+    try:
+        tree = _Vectorizer(set(names)).visit(ast.parse(expr, mode="eval"))
+    except (ValueError, SyntaxError):
+        return None
+    return compile(ast.fix_missing_locations(tree), "<vectorized>", "eval")
+
+
+def _leaves(expr: str) -> tuple[int, float]:
+    """Number of names and constants of expr, and the largest constant"""
+    leaves, largest = 0, 1
+    for node in ast.walk(ast.parse(expr, mode="eval")):
+        if isinstance(node, ast.Name):
+            leaves += 1
+        elif isinstance(node, ast.Constant):
+            leaves += 1
+            largest = max(largest, abs(node.value))
+    return leaves, largest
+
+
+class EventBatch:
+    """Events as columns. Type ids number the schema types in sorted order,
+    as in the binary event log, followed by the types outside the schema in
+    order of appearance. A column holds 0 where its attribute is missing,
+    `missing` telling those entries apart for the columns that have any."""
+
+    def __init__(
+        self,
+        schema: dict[str, list[str]],
+        types: "np.ndarray",
+        columns: dict[str, "np.ndarray"],
+        type_names: list[str] = None,
+        missing: dict[str, "np.ndarray"] = None,
+    ) -> None:
+        if np is None:
+            raise ImportError("EventBatch requires numpy")
+        self.layout = LogLayout(schema)
+        self.event_schema = EventSchema(schema)
+        self.type_names = list(self.layout.types if type_names is None else type_names)
+        self.types = np.asarray(types, dtype=np.int64)
+        self.columns = dict(
+            (name, np.asarray(column, dtype=np.int64))
+            for name, column in columns.items()
+        )
+        self.missing = missing or {}
+        self._events: list[CompactEvent] = None
+
+    @classmethod
+    def from_events(
+        cls, events: Iterable[Event], schema: dict[str, list[str]]
+    ) -> "EventBatch":
+        layout = LogLayout(schema)
+        names = sorted(set(name for attrs in schema.values() for name in attrs))
+        type_ids = dict(layout.type_ids)
+        type_names = list(layout.types)
+        types = []
+        values = dict((name, []) for name in names)
+        missing = dict((name, []) for name in names)
+        for event in events:
+            ev_type_id = type_ids.get(event.type)
+            if ev_type_id is None:
+                ev_type_id = type_ids[event.type] = len(type_names)
+                type_names.append(event.type)
+            types.append(ev_type_id)
+            attrs = event.attrs
+            wanted = schema.get(event.type, ())
+            for name in names:
+                value = attrs.get(name) if name in wanted else None
+                values[name].append(0 if value is None else value)
+                missing[name].append(value is None)
+        missing = dict(
+            (name, np.array(flags, dtype=bool))
+            for name, flags in missing.items()
+            if any(flags)
+        )
+        return cls(schema, types, values, type_names, missing)
+
+    @classmethod
+    def from_log(cls, log: EventLog) -> "EventBatch":
+        """Copy of the columns of a mapped binary event log"""
+        layout = log.layout
+        records = np.frombuffer(log._buffer, dtype="<i8").reshape(-1, 1 + layout.width)
+        types = records[:, 0].astype(np.int64)
+        columns: dict[str, np.ndarray] = {}
+        present: dict[str, np.ndarray] = {}
+        for type_id, ev_type in enumerate(layout.types):
+            rows = types == type_id
+            for slot, name in enumerate(layout.schema[ev_type]):
+                if name not in columns:
+                    columns[name] = np.zeros(len(types), dtype=np.int64)
+                    present[name] = np.zeros(len(types), dtype=bool)
+                columns[name][rows] = records[rows, 1 + slot]
+                present[name] |= rows
+        missing = dict(
+            (name, ~flags) for name, flags in present.items() if not flags.all()
+        )
+        return cls(layout.schema, types, columns, missing=missing)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def events(self) -> list[CompactEvent]:
+        """The events of the batch, built once"""
+        if self._events is None:
+            columns = dict((name, c.tolist()) for name, c in self.columns.items())
+            missing = dict((name, m.tolist()) for name, m in self.missing.items())
+            make = self.event_schema.make
+            self._events = events = []
+            for row, type_id in enumerate(self.types.tolist()):
+                ev_type = self.type_names[type_id]
+                events.append(
+                    make(
+                        ev_type,
+                        tuple(
+                            None
+                            if name in missing and missing[name][row]
+                            else columns[name][row]
+                            for name in self.layout.schema.get(ev_type, ())
+                        ),
+                    )
+                )
+        return self._events
+
+    def __iter__(self) -> Iterator[CompactEvent]:
+        return iter(self.events())
+
+    def guard(self, p: "Predicte") -> list[bool]:
+        """Outcome of p for every event of the batch, None if p cannot be
+        vectorized"""
+        if p.epsilon or p.ev_type == p.ANY_TYPE:
+            return None
+        if p.ev_type not in self.type_names:
+            return [False] * len(self)
+        rows = self.types == self.type_names.index(p.ev_type)
+        if p.trivial:
+            return rows.tolist()
+        names = self.layout.schema.get(p.ev_type, ())
+        code = vectorize(p.cndt["expr"], names)
+        if code is None:
+            return None
+        attributes = [name for name in code.co_names if name in self.columns]
+        for name in attributes:
+            if name in self.missing and self.missing[name][rows].any():
+                return None
+        # without multiplication, no intermediate value exceeds the sum of
+        # the magnitudes of the leaves: fall back if that may overflow int64
+        leaves, largest = _leaves(p.cndt["expr"])
+        for name in attributes:
+            column = self.columns[name][rows]
+            if len(column):
+                largest = max(largest, abs(int(column.min())), int(column.max()))
+        if leaves * largest >= 1 << 63:
+            return None
+        scope = {
+            _TRUTH: _truth,
+            _NOT: _not,
+            _INT: _int,
+            _WHERE: np.where,
+            "__builtins__": None,
+        }
+        with np.errstate(all="ignore"):
+            holds = np.broadcast_to(eval(code, scope, self.columns), rows.shape)
+        return (rows & holds).tolist()
+
+    def guards(self, dst: "DST") -> list[list[bool]]:
+        """Per edge of dst, the outcome of its guard for every event of the
+        batch, None for the edges to evaluate one event at a time"""
+        outcomes: dict[int, list[bool]] = {}
+        for edge in dst.edges:
+            if id(edge.p) not in outcomes:
+                outcomes[id(edge.p)] = self.guard(edge.p)
+        return [outcomes[id(edge.p)] for edge in dst.edges]
+
+
+def _truth(value) -> "np.ndarray":
+    return np.not_equal(value, 0)
+
+
+def _not(value) -> "np.ndarray":
+    return np.equal(value, 0).astype(np.int64)
+
+
+def _int(value) -> "np.ndarray":
+    return np.asarray(value).astype(np.int64)
@@ -0,0 +1,201 @@
+"""Throughput benchmarks of queries on synthetic event streams.
+
+Streams are drawn per query by reflinkcep.workload, so that a chosen
+fraction of the events (the selectivity) satisfies the condition of a
+pattern of the query.
+"""
+
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from itertools import islice
+from pathlib import Path
+from time import perf_counter_ns
+from typing import Iterable, Iterator
+
+from reflinkcep.ast import EXAMPLE_ASTS_PATH, Query
+from reflinkcep.compile import compile
+from reflinkcep.event import Event
+from reflinkcep.explain import explain
+from reflinkcep.workload import Workload
+
+CHUNK = 10000  # events generated ahead of the feeds
+BATCH = 100  # events fed between two clock reads
+
+
+def example_queries() -> list[Query]:
+    return [
+        Query.from_sample(path.stem)
+        for path in sorted(EXAMPLE_ASTS_PATH.glob("*.yml"))
+    ]
+
+
+def synthetic_stream(
+    query: Query, selectivity: float = 0.5, seed: int = 0
+) -> Iterator[Event]:
+    """Endless stream of events of the query schema, a `selectivity` fraction
+    of them matching some pattern of the query"""
+    return iter(Workload.for_query(query, selectivity, seed))
+
+
+@dataclass
+class BenchResult:
+    query: str
+    length: int
+    selectivity: float
+    # wall time of the feeds of each repeat
+    elapsed_s: list[float] = field(default_factory=list)
+    events: int = 0  # fed per repeat, less than length when truncated
+    matches: int = 0  # emitted per repeat
+    peak_partial_matches: int = 0
+    # peak traced by tracemalloc over a separate run, None if not measured
+    peak_memory_bytes: int = None
+    truncated: bool = False  # stopped after max_seconds
+    skipped: str = None  # why the query was not run
+
+    @property
+    def events_per_s(self) -> float:
+        if not self.elapsed_s:
+            return 0.0
+        return self.events / statistics.median(self.elapsed_s)
+
+    @property
+    def matches_per_s(self) -> float:
+        if not self.elapsed_s:
+            return 0.0
+        return self.matches / statistics.median(self.elapsed_s)
+
+    def to_dict(self) -> dict:
+        record = asdict(self)
+        record["events_per_s"] = self.events_per_s
+        record["matches_per_s"] = self.matches_per_s
+        return record
+
+
+def _run_once(
+    query: Query,
+    length: int,
+    selectivity: float,
+    seed: int,
+    max_seconds: float = None,
+) -> tuple[int, float, int, int, bool]:
+    """events fed, elapsed seconds, matches, peak partial matches, truncated"""
+    executor = compile(query)
+    executor.reset()
+    stream = synthetic_stream(query, selectivity, seed)
+    deadline = None if max_seconds is None else int(max_seconds * 1e9)
+    fed = elapsed = matches = peak = 0
+    while fed < length:
+        chunk = list(islice(stream, min(CHUNK, length - fed)))
+        for begin in range(0, len(chunk), BATCH):
+            start = perf_counter_ns()
+            for event in chunk[begin : begin + BATCH]:
+                matches += len(executor.feed(event))
+                live = len(executor.S)
+                if live > peak:
+                    peak = live
+            elapsed += perf_counter_ns() - start
+            fed += min(BATCH, len(chunk) - begin)
+            if deadline is not None and elapsed >= deadline and fed < length:
+                return fed, elapsed / 1e9, matches, peak, True
+    return fed, elapsed / 1e9, matches, peak, False
+
+
+def bench_query(
+    query: Query,
+    length: int,
+    selectivity: float = 0.5,
+    warmup: int = 1,
+    repeats: int = 3,
+    seed: int = 0,
+    max_seconds: float = None,
+    budget: float = None,
+    memory: bool = True,
+) -> BenchResult:
+    """Feed `length` synthetic events to query, `repeats` times after `warmup`
+    untimed runs on a prefix of the stream. Queries whose estimated live
+    partial matches (see reflinkcep.explain, calibrated on the stream) exceed
+    budget are skipped. With memory, one more untimed run measures the peak
+    memory under tracemalloc."""
+    result = BenchResult(query.from_source, length, selectivity)
+    if budget is not None:
+        sample = list(islice(synthetic_stream(query, selectivity, seed), 1000))
+        estimate = explain(query, min(length, 100), sample=sample).estimate
+        if estimate > budget:
+            result.skipped = "estimated {:.4g} partial matches".format(estimate)
+            return result
+
+    for _ in range(warmup):
+        _run_once(query, min(length, CHUNK // 10), selectivity, seed, max_seconds)
+    for _ in range(repeats):
+        fed, elapsed, matches, peak, truncated = _run_once(
+            query, length, selectivity, seed, max_seconds
+        )
+        result.elapsed_s.append(elapsed)
+        result.events = fed
+        result.matches = matches
+        result.peak_partial_matches = peak
+        result.truncated = truncated
+        if truncated:
+            # later repeats would only stop at different points
+            break
+    if memory:
+        tracemalloc.start()
+        try:
+            _run_once(query, result.events, selectivity, seed)
+            result.peak_memory_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def _git(*args: str) -> str:
+    try:
+        out = subprocess.run(
+            ["git", *args],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() if out.returncode == 0 else None
+
+
+def environment() -> dict:
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": socket.gethostname(),
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": None if status is None else bool(status),
+    }
+
+
+def bench_suite(
+    queries: Iterable[Query],
+    lengths: Iterable[int],
+    selectivity: float = 0.5,
+    **options,
+) -> dict:
+    """Benchmark every query at every length, as a JSON-serializable report.
+    options are passed to bench_query."""
+    results = []
+    for query in queries:
+        for length in lengths:
+            result = bench_query(query, length, selectivity, **options)
+            results.append(result.to_dict())
+    settings = dict(options, selectivity=selectivity, lengths=list(lengths))
+    return {"environment": environment(), "settings": settings, "results": results}
@@ -0,0 +1,83 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from reflinkcep.ast import Query
+from reflinkcep.bench import bench_suite, example_queries
+from reflinkcep.bench.store import DEFAULT_STORE, ResultsStore
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m reflinkcep.bench",
+        description="Throughput of queries on synthetic streams, as JSON",
+    )
+    parser.add_argument(
+        "queries",
+        type=Path,
+        nargs="*",
+        help="YAML query files, all of example-patseq-asts by default",
+    )
+    parser.add_argument(
+        "-n", "--lengths", type=int, nargs="+", default=[1000, 10000]
+    )
+    parser.add_argument("-s", "--selectivity", type=float, default=0.5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--max-seconds", type=float, default=60, help="per run, 0 for no limit"
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=1e6,
+        help="skip queries estimated to keep more partial matches, 0 to run all",
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip the tracemalloc run"
+    )
+    parser.add_argument("-o", "--output", type=Path, help="default: stdout")
+    parser.add_argument(
+        "--save",
+        metavar="LABEL",
+        nargs="?",
+        const="",
+        help="also store the report, see python -m reflinkcep.bench.compare",
+    )
+    parser.add_argument("--store", type=Path, default=DEFAULT_STORE)
+    args = parser.parse_args(argv)
+
+    if args.queries:
+        queries = []
+        for path in args.queries:
+            with open(path) as f:
+                queries.append(Query.from_yaml(f, path.stem))
+    else:
+        queries = example_queries()
+
+    report = bench_suite(
+        queries,
+        args.lengths,
+        args.selectivity,
+        warmup=args.warmup,
+        repeats=args.repeats,
+        seed=args.seed,
+        max_seconds=args.max_seconds or None,
+        budget=args.budget or None,
+        memory=not args.no_memory,
+    )
+    if args.save is not None:
+        run = ResultsStore(args.store).save(report, args.save)
+        print("saved run {}".format(run), file=sys.stderr)
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
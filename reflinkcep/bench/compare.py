@@ -0,0 +1,170 @@
+"""Comparison of two benchmark reports.
+
+A throughput change is only a regression when it is beyond both the
+threshold and twice the run-to-run noise, estimated from the coefficient of
+variation of the repeats of each report.
+"""
+
+import argparse
+import json
+import math
+import statistics
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from reflinkcep.bench.store import DEFAULT_STORE, ResultsStore
+
+DEFAULT_THRESHOLD = 0.05
+
+
+def _noise(result: dict) -> float:
+    elapsed = result["elapsed_s"]
+    if len(elapsed) < 2:
+        return 0.0
+    return statistics.stdev(elapsed) / statistics.mean(elapsed)
+
+
+def _key(result: dict) -> tuple:
+    return result["query"], result["length"], result["selectivity"]
+
+
+def _delta(base: float, head: float) -> float:
+    if base is None or head is None:
+        return None
+    if base == 0:
+        return 0.0 if head == 0 else math.inf
+    return head / base - 1
+
+
+@dataclass
+class QueryDelta:
+    query: str
+    length: int
+    selectivity: float
+    base_events_per_s: float
+    head_events_per_s: float
+    throughput_delta: float  # relative, > 0 is faster
+    base_memory_bytes: int
+    head_memory_bytes: int
+    memory_delta: float  # relative, > 0 uses more, None if not measured
+    noise: float  # relative, of the throughput delta
+    regression: bool
+
+
+def compare(
+    base: dict, head: dict, threshold: float = DEFAULT_THRESHOLD
+) -> list[QueryDelta]:
+    """Deltas of the results present, and not skipped, in both reports"""
+    base_results = dict((_key(r), r) for r in base["results"] if not r["skipped"])
+    deltas = []
+    for result in head["results"]:
+        old = base_results.get(_key(result))
+        if old is None or result["skipped"]:
+            continue
+        noise = math.hypot(_noise(old), _noise(result))
+        throughput = _delta(old["events_per_s"], result["events_per_s"])
+        memory = _delta(old.get("peak_memory_bytes"), result.get("peak_memory_bytes"))
+        slower = -throughput > max(threshold, 2 * noise)
+        larger = memory is not None and memory > threshold
+        deltas.append(
+            QueryDelta(
+                *_key(result),
+                old["events_per_s"],
+                result["events_per_s"],
+                throughput,
+                old.get("peak_memory_bytes"),
+                result.get("peak_memory_bytes"),
+                memory,
+                noise,
+                slower or larger,
+            )
+        )
+    return deltas
+
+
+def _percent(delta: float) -> str:
+    return "-" if delta is None else "{:+.1f}%".format(100 * delta)
+
+
+def format_report(base: dict, head: dict, deltas: list[QueryDelta]) -> str:
+    lines = []
+    for name, report in (("base", base), ("head", head)):
+        env = report["environment"]
+        lines.append(
+            "{}: {} {}{} python {} on {}".format(
+                name,
+                env.get("time", "?"),
+                (env.get("commit") or "?")[:10],
+                "+dirty" if env.get("dirty") else "",
+                env["python"],
+                env.get("host", env["platform"]),
+            )
+        )
+    lines.append(
+        "{:<28} {:>8} {:>12} {:>12} {:>9} {:>7} {:>9}".format(
+            "query", "length", "base ev/s", "head ev/s", "Δ ev/s", "noise", "Δ memory"
+        )
+    )
+    for d in deltas:
+        lines.append(
+            "{:<28} {:>8} {:>12.0f} {:>12.0f} {:>9} {:>7} {:>9}{}".format(
+                d.query,
+                d.length,
+                d.base_events_per_s,
+                d.head_events_per_s,
+                _percent(d.throughput_delta),
+                "±{:.1f}%".format(100 * d.noise),
+                _percent(d.memory_delta),
+                "  REGRESSION" if d.regression else "",
+            )
+        )
+    regressions = sum(1 for d in deltas if d.regression)
+    lines.append("{} of {} results regressed".format(regressions, len(deltas)))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m reflinkcep.bench.compare",
+        description="Compare two stored benchmark runs, the last two by default",
+    )
+    parser.add_argument("base", nargs="?", help="run id or report file")
+    parser.add_argument("head", nargs="?", help="run id or report file")
+    parser.add_argument("--store", type=Path, default=DEFAULT_STORE)
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="relative change flagged as a regression",
+    )
+    parser.add_argument("--list", action="store_true", help="list stored runs")
+    parser.add_argument("--json", action="store_true", help="print deltas as JSON")
+    args = parser.parse_args(argv)
+
+    store = ResultsStore(args.store)
+    runs = store.runs()
+    if args.list:
+        print("\n".join(runs))
+        return
+    if args.head is None:
+        if len(runs) < (1 if args.base else 2):
+            parser.error("not enough runs stored in {}".format(args.store))
+        base, head = args.base or runs[-2], runs[-1]
+    else:
+        base, head = args.base, args.head
+
+    base, head = store.load(base), store.load(head)
+    deltas = compare(base, head, args.threshold)
+    if args.json:
+        json.dump([asdict(d) for d in deltas], sys.stdout, indent=2)
+        print()
+    else:
+        print(format_report(base, head, deltas))
+    if any(d.regression for d in deltas):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
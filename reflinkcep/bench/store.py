@@ -0,0 +1,57 @@
+"""Local store of benchmark reports, one JSON file per run"""
+
+import json
+import re
+import time
+from pathlib import Path
+
+DEFAULT_STORE = Path(".bench-results")
+_SEQUENCE = re.compile(r"(\d+)-\d{8}-\d{6}(?:-|$)")
+
+
+class ResultsStore:
+    def __init__(self, root: Path = DEFAULT_STORE) -> None:
+        self.root = Path(root)
+
+    def save(self, report: dict, label: str = None) -> str:
+        """Store report, returns its run id: a sequence number, the time it
+        is saved at and label. Runs are ordered by the sequence number, as
+        several may be saved within the same second."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        while True:
+            runs = self.runs()
+            sequence = 1 + max((_sequence(run) for run in runs), default=0)
+            run = "{:04d}-{}".format(sequence, time.strftime("%Y%m%d-%H%M%S"))
+            if label:
+                run += "-" + re.sub(r"[^\w.-]+", "_", label)
+            try:
+                f = open(self.root / "{}.json".format(run), "x")
+            except FileExistsError:  # saved concurrently, take the next number
+                continue
+            with f:
+                json.dump(report, f, indent=2)
+            return run
+
+    def runs(self) -> list[str]:
+        """Run ids, oldest first"""
+        runs = [path.stem for path in self.root.glob("*.json")]
+        return sorted(runs, key=lambda run: (_sequence(run), run))
+
+    def path(self, run: str) -> Path:
+        """Path of a run id, or of a report file given directly"""
+        if Path(run).is_file():
+            return Path(run)
+        path = self.root / "{}.json".format(run)
+        if not path.is_file():
+            raise KeyError("No benchmark run {} in {}".format(run, self.root))
+        return path
+
+    def load(self, run: str) -> dict:
+        with open(self.path(run)) as f:
+            return json.load(f)
+
+
+def _sequence(run: str) -> int:
+    """Sequence number of a run id, 0 for ids saved without one"""
+    match = _SEQUENCE.match(run)
+    return int(match.group(1)) if match else 0
@@ -0,0 +1,137 @@
+"""Precompiled query bundles.
+
+A bundle holds compiled DSTs of many queries together with the marshalled code
+objects of their conditions and data updates, so that a worker can load all
+of its queries with one read and without parsing YAML or recompiling.
+"""
+
+import argparse
+import importlib.util
+import marshal
+from pathlib import Path
+from typing import Iterable
+
+from reflinkcep.ast import Query
+from reflinkcep.compile import compile_impl
+from reflinkcep.DST import (
+    DST,
+    DataUpdate,
+    EventStreamUpdate,
+    Predicte,
+    Set,
+    State,
+    Transition,
+    _code_cache,
+)
+from reflinkcep.executor import AfterMatchStrategy, Executor
+
+BUNDLE_MAGIC = b"RLCEPQB\x00"
+BUNDLE_VERSION = 2
+# marshalled code objects are only valid for the interpreter that produced them
+BUNDLE_HEADER = BUNDLE_MAGIC + importlib.util.MAGIC_NUMBER + bytes([BUNDLE_VERSION])
+
+
+class BundleError(ValueError):
+    pass
+
+
+def dump_dst(dst: DST, strategy: AfterMatchStrategy) -> tuple:
+    states = [(q.label, q.out) for q in dst.states]
+    transitions = [
+        (
+            edge.q1.id,
+            edge.p.ev_type,
+            edge.p.cndt["expr"],
+            edge.q2.id,
+            edge.alpha.alpha,
+            edge.beta.sink,
+            edge.origin,
+        )
+        for edge in dst.edges
+    ]
+    return (
+        str(strategy),
+        sorted(dst.Sigma),
+        sorted(dst.Pi),
+        sorted(dst.X),
+        sorted(dst.Y),
+        dst.eta,
+        states,
+        transitions,
+    )
+
+
+def load_dst(record: tuple) -> tuple[DST, AfterMatchStrategy]:
+    strategy, Sigma, Pi, X, Y, eta, states, transitions = record
+    Q = [State(label, out) for label, out in states]
+    D = [
+        Transition(
+            Q[q1],
+            Predicte(ev_type, {"expr": expr}),
+            Q[q2],
+            DataUpdate(alpha),
+            EventStreamUpdate(sink),
+            origin=origin,
+        )
+        for q1, ev_type, expr, q2, alpha, sink, origin in transitions
+    ]
+    dst = DST(Set(Sigma), Set(Pi), Set(X), Set(Y), Set(Q), Q[0], eta, D)
+    return dst, AfterMatchStrategy(strategy)
+
+
+def build_bundle(queries: dict[str, Query]) -> bytes:
+    records = dict(
+        (name, dump_dst(*compile_impl(query.patseq, query.context)))
+        for name, query in queries.items()
+    )
+    # only ship the code objects the bundled queries refer to
+    exprs = Set()
+    for _, _, _, _, _, _, _, transitions in records.values():
+        for _, _, expr, _, alpha, _, _ in transitions:
+            exprs.add(("<condition>", expr))
+            exprs.update(("<data_update>", e) for e in alpha.values())
+    codes = [(filename, expr, _code_cache[filename, expr]) for filename, expr in exprs]
+    return BUNDLE_HEADER + marshal.dumps((codes, records))
+
+
+def parse_bundle(data: bytes) -> dict[str, Executor]:
+    if not data.startswith(BUNDLE_MAGIC):
+        raise BundleError("Not a query bundle")
+    if not data.startswith(BUNDLE_HEADER):
+        raise BundleError(
+            "Query bundle built by an incompatible interpreter or bundle version"
+        )
+    codes, records = marshal.loads(memoryview(data)[len(BUNDLE_HEADER) :])
+    for filename, expr, code in codes:
+        _code_cache.setdefault((filename, expr), code)
+    return dict((name, Executor(*load_dst(record))) for name, record in records.items())
+
+
+def write_bundle(path: Path, queries: dict[str, Query]) -> None:
+    with open(path, "wb") as f:
+        f.write(build_bundle(queries))
+
+
+def read_bundle(path: Path) -> dict[str, Executor]:
+    with open(path, "rb") as f:
+        return parse_bundle(f.read())
+
+
+def main(argv: Iterable[str] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m reflinkcep.bundle",
+        description="Compile YAML queries into a precompiled query bundle",
+    )
+    parser.add_argument("output", type=Path, help="bundle file to write")
+    parser.add_argument("queries", type=Path, nargs="+", help="YAML query files")
+    args = parser.parse_args(argv)
+
+    queries = dict()
+    for path in args.queries:
+        with open(path) as f:
+            queries[path.stem] = Query.from_yaml(f, path.stem)
+    write_bundle(args.output, queries)
+
+
+if __name__ == "__main__":
+    main()
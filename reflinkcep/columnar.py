@@ -0,0 +1,183 @@
+"""Columnar export of matches.
+
+Matches are flattened in one pass into one row per matched event: the
+match id (its rank in the input), the pattern variable, the index of the
+event in that variable, its stream position for position matches, its type
+and one column per schema attribute. Columns are accumulated in typed
+arrays and handed to NumPy, or to pandas, without per-row Python objects.
+`MatchColumns` is also a sink, so `CEPOperator.run` can fill it directly.
+
+NumPy is optional (the `numpy` extra), pandas too.
+"""
+
+from array import array
+from typing import Iterable
+
+from reflinkcep.delta import DeltaMatch
+from reflinkcep.event import EventBuffer, Stream
+from reflinkcep.executor import Match
+from reflinkcep.sinks import MatchSink
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+
+class MatchColumns(MatchSink):
+    """Rows of matched events as typed columns, see the module docstring.
+    As a sink, it collects the matches of a `CEPOperator.run`. Position
+    matches are resolved by the events of `events`. Delta matches are not
+    taken, expand them with a DeltaDecoder first."""
+
+    deltas = False
+
+    def __init__(
+        self, schema: dict[str, list[str]], events: EventBuffer = None
+    ) -> None:
+        self.attributes = sorted(set(name for attrs in schema.values() for name in attrs))
+        self.events = events
+        self.count = 0  # matches appended so far, the id of the next one
+        self.match = array("q")
+        self.index = array("q")
+        self.position = array("q")
+        self.has_positions = False
+        # variables and event types as codes into these lists
+        self.variable = array("q")
+        self.variables: list[str] = []
+        self._variable_codes: dict[str, int] = {}
+        self.type = array("q")
+        self.types: list[str] = []
+        self._type_codes: dict[str, int] = {}
+        self.values = dict((name, array("q")) for name in self.attributes)
+        self.missing = dict((name, array("b")) for name in self.attributes)
+
+    @classmethod
+    def collect(
+        cls,
+        matches: Iterable[Match],
+        schema: dict[str, list[str]],
+        events: EventBuffer = None,
+    ) -> "MatchColumns":
+        columns = cls(schema, events)
+        for match in matches:
+            columns.append(match)
+        return columns
+
+    @staticmethod
+    def _code(codes: dict[str, int], names: list[str], name: str) -> int:
+        code = codes.get(name)
+        if code is None:
+            code = codes[name] = len(names)
+            names.append(name)
+        return code
+
+    def emit(self, position: int, matches: Stream[Match]) -> None:
+        for match in matches:
+            self.append(match)
+
+    def append(self, match: Match) -> None:
+        if isinstance(match, DeltaMatch):
+            raise ValueError("Expand delta matches before exporting them")
+        id = self.count
+        self.count += 1
+        columns = [
+            (attr, self.values[attr].append, self.missing[attr].append)
+            for attr in self.attributes
+        ]
+        for name, stream in match.items():
+            variable = self._code(self._variable_codes, self.variables, name)
+            n = len(stream)
+            self.match.extend([id] * n)
+            self.variable.extend([variable] * n)
+            self.index.extend(range(n))
+            if stream and isinstance(stream[0], int):
+                if self.events is None:
+                    raise ValueError("Position matches need an EventBuffer")
+                self.has_positions = True
+                self.position.extend(stream)
+                stream = [self.events[position] for position in stream]
+            else:
+                self.position.extend([-1] * n)
+            for event in stream:
+                self.type.append(
+                    self._code(self._type_codes, self.types, event.type)
+                )
+                attrs = event.get_attrs()
+                for attr, value_append, missing_append in columns:
+                    value = attrs.get(attr)
+                    value_append(0 if value is None else value)
+                    missing_append(value is None)
+
+    def __len__(self) -> int:
+        return len(self.match)
+
+    @staticmethod
+    def _names(names: list[str], codes: array) -> "np.ndarray":
+        labels = np.array(names or [""], dtype=str)
+        return labels[np.frombuffer(codes, dtype=np.int64)]
+
+    def to_numpy(self) -> "np.ndarray":
+        """Structured array of the rows; missing attributes are 0, the position
+        field is there only for position matches"""
+        if np is None:
+            raise ImportError("Exporting to NumPy requires numpy")
+        variables = self._names(self.variables, self.variable)
+        types = self._names(self.types, self.type)
+        fields = [("match", np.int64), ("variable", variables.dtype)]
+        fields.append(("index", np.int64))
+        if self.has_positions:
+            fields.append(("position", np.int64))
+        fields.append(("type", types.dtype))
+        fields.extend((name, np.int64) for name in self.attributes)
+        rows = np.empty(len(self), dtype=fields)
+        rows["match"] = np.frombuffer(self.match, dtype=np.int64)
+        rows["variable"] = variables
+        rows["index"] = np.frombuffer(self.index, dtype=np.int64)
+        if self.has_positions:
+            rows["position"] = np.frombuffer(self.position, dtype=np.int64)
+        rows["type"] = types
+        for name in self.attributes:
+            rows[name] = np.frombuffer(self.values[name], dtype=np.int64)
+        return rows
+
+    def to_dataframe(self):
+        """pandas DataFrame of the rows, variables and types categorical and
+        missing attributes NA"""
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError("Exporting to a DataFrame requires pandas") from None
+
+        # copies, as views would keep the arrays from growing
+        def column(values: array) -> "np.ndarray":
+            return np.frombuffer(values, dtype=np.int64).copy()
+
+        data = {
+            "match": column(self.match),
+            "variable": pd.Categorical.from_codes(
+                column(self.variable), self.variables
+            ),
+            "index": column(self.index),
+        }
+        if self.has_positions:
+            data["position"] = column(self.position)
+        data["type"] = pd.Categorical.from_codes(column(self.type), self.types)
+        for name in self.attributes:
+            data[name] = pd.arrays.IntegerArray(
+                column(self.values[name]),
+                np.frombuffer(self.missing[name], dtype=np.int8).astype(bool),
+            )
+        return pd.DataFrame(data)
+
+
+def matches_to_numpy(
+    matches: Iterable[Match], schema: dict[str, list[str]], events: EventBuffer = None
+) -> "np.ndarray":
+    return MatchColumns.collect(matches, schema, events).to_numpy()
+
+
+def matches_to_dataframe(
+    matches: Iterable[Match], schema: dict[str, list[str]], events: EventBuffer = None
+):
+    return MatchColumns.collect(matches, schema, events).to_dataframe()
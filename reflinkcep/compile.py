@@ -1,7 +1,7 @@
 """Compile ast to executor"""
 
 from typing import Callable
-from reflinkcep.ast import AST, Query, QueryContext, Variables
+from reflinkcep.ast import AST, ROOT_PATH, Query, QueryContext, Variables
 from reflinkcep.DST import (
     DST,
     DataUpdate,
@@ -29,6 +29,8 @@ def get_take_dataupdate(ast: AST) -> tuple[Set, DataUpdate, Func]:
 
 class ASTCompiler:
     compiler_map = dict()
+    # paths of the AST nodes being compiled, innermost last
+    origin_stack: list[str] = []
 
     @classmethod
     def register(cls, ast_type: str):
@@ -45,8 +47,19 @@ class ASTCompiler:
         raise ValueError("Not supported AST type: {}".format(ast_type))
 
     @classmethod
-    def compile(cls, ast: AST, ctx: QueryContext) -> DST:
-        return cls.get_compiler(ast["type"])(ast, ctx)
+    def compile(cls, ast: AST, ctx: QueryContext, key: str = "") -> DST:
+        """Compile ast, found at `key` of the node being compiled (see ast_at).
+        Transitions created for this node are tagged with its path."""
+        origin = (cls.origin_stack[-1] if cls.origin_stack else ROOT_PATH) + key
+        cls.origin_stack.append(origin)
+        try:
+            dst = cls.get_compiler(ast["type"])(ast, ctx)
+        finally:
+            cls.origin_stack.pop()
+        for edge in dst.Delta:
+            if edge.origin is None:
+                edge.origin = origin
+        return dst
 
 
 @ASTCompiler.register("spat")
@@ -375,8 +388,8 @@ def compile_lpat_inf(ast: AST, ctx: QueryContext) -> DST:
 @ASTCompiler.register("combine")
 def compile_combine(ast: AST, ctx: QueryContext) -> DST:
     contiguity: str = ast["contiguity"]
-    left = ASTCompiler.compile(ast["left"], ctx)
-    right = ASTCompiler.compile(ast["right"], ctx)
+    left = ASTCompiler.compile(ast["left"], ctx, ".left")
+    right = ASTCompiler.compile(ast["right"], ctx, ".right")
 
     S = left.Sigma.union(right.Sigma)
     P = left.Pi.union(right.Pi)
@@ -406,11 +419,20 @@ def compile_combine(ast: AST, ctx: QueryContext) -> DST:
         q.clear_output()
 
     if contiguity != "strict":
-        q02_ignore = State(f"{q02.name}-ignore")
+        q02_ignore = State(f"{q02.label}-ignore")
         Q.add(q02_ignore)
         for edge in right.start_from(q02):
             if edge.is_take():
-                D.append(Transition(q02_ignore, edge.p, edge.q2, edge.alpha, edge.beta))
+                D.append(
+                    Transition(
+                        q02_ignore,
+                        edge.p,
+                        edge.q2,
+                        edge.alpha,
+                        edge.beta,
+                        origin=edge.origin,
+                    )
+                )
     if contiguity == "relaxed":
         right_ast = ast["right"]
         D.append(
@@ -476,7 +498,7 @@ def compile_combine(ast: AST, ctx: QueryContext) -> DST:
 
 @ASTCompiler.register("gpat")
 def compile_gpat(ast: AST, ctx: QueryContext) -> DST:
-    return ASTCompiler.compile(ast["child"], ctx)
+    return ASTCompiler.compile(ast["child"], ctx, ".child")
 
 
 @ASTCompiler.register("gpat-times")
@@ -485,8 +507,11 @@ def compile_gpat_times(ast: AST, ctx: QueryContext) -> DST:
     n = loop["from"]
     m = loop["to"]
 
-    dst0 = ASTCompiler.compile(ast["child"], ctx)
-    dst = [ASTCompiler.compile(ast["child"], ctx) for _ in range(m)]
+    dst0 = ASTCompiler.compile(ast["child"], ctx, ".child")
+    dst = [
+        ASTCompiler.compile(ast["child"], ctx, ".child[{}]".format(i))
+        for i in range(m)
+    ]
 
     S = dst0.Sigma
     P = dst0.Pi
@@ -533,8 +558,11 @@ def compile_gpat_inf(ast: AST, ctx: QueryContext) -> DST:
     optional = n == 0
 
     n = max(n, 1)
-    dst0 = ASTCompiler.compile(ast["child"], ctx)
-    dst = [ASTCompiler.compile(ast["child"], ctx) for _ in range(n)]
+    dst0 = ASTCompiler.compile(ast["child"], ctx, ".child")
+    dst = [
+        ASTCompiler.compile(ast["child"], ctx, ".child[{}]".format(i))
+        for i in range(n)
+    ]
 
     S = dst0.Sigma
     P = dst0.Pi
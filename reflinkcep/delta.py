@@ -0,0 +1,103 @@
+"""Delta-encoded matches.
+
+Under NoSkip, a looping pattern emits a new match on every event it takes,
+each holding all the events of the previous one plus one, so the output
+grows quadratically with the loop length. A `DeltaEncoder` emits each match
+as a reference to an earlier match from the same start plus the events
+appended since, keeping the output linear. A `DeltaDecoder` expands them
+back on demand.
+"""
+
+from dataclasses import dataclass
+from operator import is_
+
+from reflinkcep.executor import Match
+
+CAPACITY = 1024  # starts whose last match is remembered
+
+
+@dataclass(slots=True)
+class DeltaMatch:
+    """Match `id`: the match `base` (all of it when None) with the events of
+    `appended` added at the end of each pattern variable. `appended` lists
+    every variable of the match, in output order."""
+
+    id: int
+    base: int
+    appended: Match
+
+
+def _extends(match: Match, base: Match) -> bool:
+    """If every stream of match starts with the one of base. The executor
+    passes the same event objects along, so events are compared by identity,
+    positions by value, which keeps each check cheap on long loops."""
+    for name, events in base.items():
+        stream = match.get(name)
+        if stream is None or len(stream) < len(events):
+            return False
+        if events and isinstance(events[0], int):
+            if stream[: len(events)] != events:
+                return False
+        elif not all(map(is_, stream, events)):
+            return False
+    return True
+
+
+class DeltaEncoder:
+    """Encodes the matches of a run, numbered from 0, against the last match
+    emitted from the same start, for the last `capacity` starts"""
+
+    def __init__(self, capacity: int = CAPACITY) -> None:
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        # start -> id and events of the last match from there, oldest first
+        self.last: dict[int, tuple[int, Match]] = {}
+
+    def encode(self, match: Match, start: int) -> DeltaMatch:
+        id = self.count
+        self.count += 1
+        previous = self.last.pop(start, None)
+        if previous is not None and _extends(match, previous[1]):
+            base, events = previous
+            appended = dict(
+                (name, stream[len(events.get(name, ())) :])
+                for name, stream in match.items()
+            )
+            delta = DeltaMatch(id, base, appended)
+        else:
+            delta = DeltaMatch(id, None, match)
+        self.last[start] = (id, match)
+        if len(self.last) > self.capacity:
+            del self.last[next(iter(self.last))]
+        return delta
+
+
+class DeltaDecoder:
+    """Keeps the delta matches of a run to expand them into full matches.
+    With a capacity, only the last that many are kept, and matches based on
+    a forgotten one cannot be expanded (KeyError)."""
+
+    def __init__(self, capacity: int = None) -> None:
+        self.capacity = capacity
+        self.deltas: dict[int, DeltaMatch] = {}
+
+    def add(self, delta: DeltaMatch) -> None:
+        self.deltas[delta.id] = delta
+        if self.capacity is not None and len(self.deltas) > self.capacity:
+            del self.deltas[next(iter(self.deltas))]
+
+    def expand(self, delta: DeltaMatch) -> Match:
+        chain = [delta]
+        while chain[-1].base is not None:
+            base = self.deltas.get(chain[-1].base)
+            if base is None:
+                raise KeyError("Match {} is not kept".format(chain[-1].base))
+            chain.append(base)
+        streams: Match = {}
+        for step in reversed(chain):
+            for name, events in step.appended.items():
+                streams.setdefault(name, []).extend(events)
+        return dict((name, streams[name]) for name in delta.appended)
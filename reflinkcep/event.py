@@ -1,4 +1,8 @@
+import sys
+from collections import deque
+from collections.abc import Mapping
 from dataclasses import dataclass
+from typing import Iterator
 
 from reflinkcep.defs import value_t
 
@@ -22,5 +26,131 @@ class Event:
         )
 
 
+class CompactEvent(Mapping):
+    """An event whose attribute values are held in a tuple, in the order the
+    schema lists them, None marking an attribute the event does not have.
+    It is its own attribute map, so conditions read it without a dict."""
+
+    __slots__ = ("type", "values", "_index")
+
+    def __init__(
+        self, ev_type: str, values: tuple[value_t, ...], index: dict[str, int]
+    ) -> None:
+        self.type = ev_type
+        self.values = values
+        self._index = index
+
+    @property
+    def attrs(self) -> "CompactEvent":
+        return self
+
+    def get_attrs(self) -> "CompactEvent":
+        return self
+
+    def __getitem__(self, key: str) -> value_t:
+        value = self.values[self._index[key]]
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        values = self.values
+        return (name for name, i in self._index.items() if values[i] is not None)
+
+    def __len__(self) -> int:
+        return len(self.values) - self.values.count(None)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, CompactEvent) and self._index is other._index:
+            return self.type == other.type and self.values == other.values
+        if hasattr(other, "get_attrs"):  # any event, EventViews of a log too
+            return self.type == other.type and dict(self) == dict(other.get_attrs())
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def to_event(self) -> Event:
+        return Event(self.type, dict(self.items()))
+
+    def __repr__(self) -> str:
+        return "{}({})".format(
+            self.type, ",".join(str(v) for v in self.values if v is not None)
+        )
+
+
+class EventSchema:
+    """Attribute positions of every event type of a query schema, resolved
+    once and shared by all the CompactEvents built from it. Event types are
+    interned, so type tests mostly compare identities."""
+
+    def __init__(self, schema: dict[str, list[str]]) -> None:
+        self.schema = dict((t, list(attrs)) for t, attrs in schema.items())
+        self.index: dict[str, dict[str, int]] = dict(
+            (sys.intern(t), dict((name, i) for i, name in enumerate(attrs)))
+            for t, attrs in schema.items()
+        )
+        self._types = dict((t, t) for t in self.index)
+        self._empty: dict[str, int] = {}
+
+    def _type(self, ev_type: str) -> tuple[str, dict[str, int]]:
+        interned = self._types.get(ev_type)
+        if interned is None:
+            return sys.intern(ev_type), self._empty
+        return interned, self.index[interned]
+
+    def make(self, ev_type: str, values: tuple[value_t, ...]) -> CompactEvent:
+        """Event from its values, in schema order"""
+        ev_type, index = self._type(ev_type)
+        if len(values) != len(index):
+            raise ValueError(
+                "{} takes {} attributes, got {}".format(
+                    ev_type, len(index), len(values)
+                )
+            )
+        return CompactEvent(ev_type, values, index)
+
+    def event(self, ev_type: str, attrs: Mapping[str, value_t]) -> CompactEvent:
+        """Event keeping the attributes of attrs the schema lists for ev_type"""
+        ev_type, index = self._type(ev_type)
+        return CompactEvent(ev_type, tuple(attrs.get(name) for name in index), index)
+
+    def compact(self, event: Event) -> CompactEvent:
+        return self.event(event.type, event.attrs)
+
+
 Stream = list
 EventStream = Stream[Event]
+
+
+class EventBuffer:
+    """The last `capacity` events of a stream (all of them if None), looked up
+    by stream position, counted from 1 as the executor does"""
+
+    def __init__(self, capacity: int = None) -> None:
+        self.events: deque[Event] = deque(maxlen=capacity)
+        self.end = 1  # position of the next event
+
+    def append(self, event: Event) -> int:
+        self.events.append(event)
+        self.end += 1
+        return self.end - 1
+
+    def clear(self) -> None:
+        self.events.clear()
+        self.end = 1
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __getitem__(self, position: int) -> Event:
+        index = position - self.end + len(self.events)
+        if not 0 <= index < len(self.events):
+            raise KeyError("Event {} is not retained".format(position))
+        return self.events[index]
+
+    def resolve(self, match: dict[str, list[int]]) -> dict[str, EventStream]:
+        """Events of a match given as stream positions"""
+        return dict(
+            (name, [self[position] for position in positions])
+            for name, positions in match.items()
+        )
@@ -0,0 +1,288 @@
+"""Event files: JSON lines, and a fixed-width binary event log.
+
+JSON lines hold one {"type": ..., "attrs": {...}} object per event and are
+compressed with gzip or lzma when the path ends with .gz or .xz.
+
+The binary log is laid out from a query schema, since every attribute value
+is an int (`value_t`). After the header, which holds the schema, every
+record is a little-endian int64 type id followed by one int64 per attribute,
+as many as the widest event type, unused slots being 0. `EventLog` maps a
+log in memory and serves its records as `EventView`s, read in place.
+"""
+
+import gzip
+import json
+import lzma
+import mmap
+import struct
+import sys
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+from reflinkcep.event import CompactEvent, Event
+
+LOG_MAGIC = b"RLCEPEV\x00"
+LOG_VERSION = 1
+# magic, version, attributes per record, length of the JSON schema
+LOG_HEADER = struct.Struct("<8sHHI")
+LOG_ALIGN = 8
+BATCH = 4096  # records packed or unpacked at once
+
+
+class EventLogError(ValueError):
+    pass
+
+
+def open_text(path: Path, mode: str = "r") -> IO[str]:
+    """Open a text file, through gzip or lzma for .gz and .xz paths"""
+    suffix = Path(path).suffix
+    if suffix == ".gz":
+        return gzip.open(path, mode + "t")
+    if suffix == ".xz":
+        return lzma.open(path, mode + "t")
+    return open(path, mode)
+
+
+def write_jsonl(path: Path, events: Iterable[Event]) -> int:
+    """Write events as JSON lines, returns how many were written"""
+    count = 0
+    with open_text(path, "w") as f:
+        for event in events:
+            attrs = event.attrs
+            if not isinstance(attrs, dict):
+                attrs = dict(attrs)
+            f.write(json.dumps({"type": event.type, "attrs": attrs}))
+            f.write("\n")
+            count += 1
+    return count
+
+
+class LogLayout:
+    """Record layout of a schema, event types numbered in sorted order"""
+
+    def __init__(self, schema: dict[str, list[str]]) -> None:
+        self.schema = dict((t, list(attrs)) for t, attrs in schema.items())
+        self.types = sorted(schema)
+        self.type_ids = dict((t, i) for i, t in enumerate(self.types))
+        self.width = max((len(attrs) for attrs in schema.values()), default=0)
+        self.record = struct.Struct("<{}q".format(1 + self.width))
+
+    def header(self) -> bytes:
+        schema = json.dumps(self.schema, sort_keys=True).encode()
+        header = LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, self.width, len(schema))
+        header += schema
+        return header + bytes(-len(header) % LOG_ALIGN)
+
+    @staticmethod
+    def parse_header(data: bytes) -> tuple["LogLayout", int]:
+        """Layout of the log starting with data, and the offset of its first
+        record"""
+        if len(data) < LOG_HEADER.size:
+            raise EventLogError("Not an event log: too short")
+        magic, version, width, length = LOG_HEADER.unpack_from(data)
+        if magic != LOG_MAGIC:
+            raise EventLogError("Not an event log")
+        if version != LOG_VERSION:
+            raise EventLogError("Unsupported event log version {}".format(version))
+        end = LOG_HEADER.size + length
+        layout = LogLayout(json.loads(bytes(data[LOG_HEADER.size : end])))
+        if layout.width != width:
+            raise EventLogError("Corrupted event log header")
+        return layout, end + (-end % LOG_ALIGN)
+
+    def pack(self, event: Event) -> tuple[int, ...]:
+        attrs = event.attrs
+        values = [attrs[name] for name in self.schema[event.type]]
+        values.extend(0 for _ in range(self.width - len(values)))
+        return (self.type_ids[event.type], *values)
+
+    def unpack(self, values: tuple[int, ...]) -> Event:
+        ev_type = self.types[values[0]]
+        return Event(ev_type, dict(zip(self.schema[ev_type], values[1:])))
+
+
+class EventLogWriter:
+    def __init__(self, path: Path, schema: dict[str, list[str]]) -> None:
+        self.layout = LogLayout(schema)
+        self.file = open(path, "wb")
+        self.file.write(self.layout.header())
+        self.buffer = bytearray()
+        self.count = 0
+
+    def write(self, event: Event) -> None:
+        self.buffer += self.layout.record.pack(*self.layout.pack(event))
+        self.count += 1
+        if len(self.buffer) >= BATCH * self.layout.record.size:
+            self.flush()
+
+    def flush(self) -> None:
+        self.file.write(self.buffer)
+        self.buffer.clear()
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self) -> "EventLogWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def write_event_log(
+    path: Path, schema: dict[str, list[str]], events: Iterable[Event]
+) -> int:
+    """Write events in the binary log format, returns how many were written"""
+    with EventLogWriter(path, schema) as writer:
+        for event in events:
+            writer.write(event)
+    return writer.count
+
+
+def read_event_log(path: Path) -> Iterator[Event]:
+    """Decode the events of a binary log, reading it in chunks"""
+    with open(path, "rb") as f:
+        head = f.read(LOG_HEADER.size)
+        if len(head) == LOG_HEADER.size:
+            head += f.read(LOG_HEADER.unpack(head)[3] + LOG_ALIGN)
+        layout, offset = LogLayout.parse_header(head)
+        f.seek(offset)
+        record = layout.record
+        while True:
+            chunk = f.read(BATCH * record.size)
+            if len(chunk) % record.size:
+                raise EventLogError("Truncated event log")
+            if not chunk:
+                return
+            for values in record.iter_unpack(chunk):
+                yield layout.unpack(values)
+
+
+class EventView(Mapping):
+    """An event of a mapped log, read in place. It is its own attribute map,
+    so `view.attrs` and `view.get_attrs()` build no dict."""
+
+    __slots__ = ("type", "_index", "_values", "_base")
+
+    def __init__(
+        self, ev_type: str, index: dict[str, int], values: Sequence[int], base: int
+    ) -> None:
+        self.type = ev_type
+        self._index = index
+        self._values = values
+        self._base = base
+
+    @property
+    def attrs(self) -> "EventView":
+        return self
+
+    def get_attrs(self) -> "EventView":
+        return self
+
+    def __getitem__(self, key: str) -> int:
+        return self._values[self._base + self._index[key]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, EventView) and self._values is other._values:
+            if self._base == other._base:
+                return True
+        if isinstance(other, (EventView, CompactEvent, Event)):
+            return self.type == other.type and dict(self) == dict(other.get_attrs())
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def to_event(self) -> Event:
+        """A copy that outlives the log"""
+        return Event(self.type, dict(self.items()))
+
+    def __repr__(self) -> str:
+        return "{}({})".format(self.type, ",".join(str(v) for v in self.values()))
+
+
+class EventLog(Sequence):
+    """Memory-mapped binary event log, indexed and iterated as EventViews.
+
+    Views read the mapping in place: once the log is closed, reading a view
+    left from it, such as one held by a match, raises ValueError. Use
+    `EventView.to_event` to keep events beyond that."""
+
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.layout, offset = LogLayout.parse_header(self._mmap)
+        size = self.layout.record.size
+        if (len(self._mmap) - offset) % size:
+            self._mmap.close()
+            raise EventLogError("Truncated event log")
+        self._count = (len(self._mmap) - offset) // size
+        self._stride = 1 + self.layout.width
+        self._buffer = memoryview(self._mmap)[offset:]
+        if sys.byteorder == "little":
+            self._values = self._buffer.cast("q")
+        else:
+            self._values = _Unpacked(self._buffer)
+        # per type id: type name and attribute name -> slot in the record
+        self._types = [
+            (t, dict((name, 1 + i) for i, name in enumerate(self.layout.schema[t])))
+            for t in self.layout.types
+        ]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _view(self, position: int) -> EventView:
+        base = position * self._stride
+        ev_type, index = self._types[self._values[base]]
+        return EventView(ev_type, index, self._values, base)
+
+    def __getitem__(self, position: int) -> EventView:
+        if isinstance(position, slice):
+            return [self._view(i) for i in range(*position.indices(self._count))]
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError("event log index out of range")
+        return self._view(position)
+
+    def __iter__(self) -> Iterator[EventView]:
+        values, types, stride = self._values, self._types, self._stride
+        for base in range(0, self._count * stride, stride):
+            ev_type, index = types[values[base]]
+            yield EventView(ev_type, index, values, base)
+
+    def close(self) -> None:
+        if isinstance(self._values, memoryview):
+            self._values.release()
+        self._buffer.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "EventLog":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class _Unpacked(Sequence):
+    """Little-endian int64 values of a buffer, on big-endian hosts"""
+
+    ITEM = struct.Struct("<q")
+
+    def __init__(self, buffer: memoryview) -> None:
+        self.buffer = buffer
+
+    def __getitem__(self, i: int) -> int:
+        return self.ITEM.unpack_from(self.buffer, 8 * i)[0]
+
+    def __len__(self) -> int:
+        return len(self.buffer) // 8
@@ -1,13 +1,19 @@
-import logging
+from typing import TYPE_CHECKING, Iterator
 
 from reflinkcep.DST import DST, Configuration
 from reflinkcep.ast import QueryContext
 from reflinkcep.event import Event, EventStream, Stream
+from reflinkcep.stats import ExecutorStats
 
 Match = dict[str, EventStream]
 MatchStream = Stream[Match]
+# a match as the stream positions of its events, see Executor.output_positions
+PositionMatch = dict[str, list[int]]
 
-logger = logging.getLogger(__name__)
+if TYPE_CHECKING:
+    from reflinkcep.batch import EventBatch
+    from reflinkcep.delta import DeltaEncoder
+    from reflinkcep.trace import Tracer
 
 
 class AfterMatchStrategy(str):
@@ -23,72 +29,182 @@ class Executor:
     def __init__(self, dst: DST, strategy: AfterMatchStrategy) -> None:
         self.dst = dst
         self.strategy = strategy
+        self.tracer: "Tracer" = None
+        # per edge, precomputed guard outcomes for the events of the batch
+        # being fed (None for edges evaluated per event), see guarded()
+        self._guards: list[list[bool]] = None
+        self._row = 0
+        # record stream positions instead of events in contexts and matches
+        self.output_positions = False
+        # when set, matches are output delta-encoded by it
+        self.delta: "DeltaEncoder" = None
+        self.reset_stats()
+
+    def set_tracer(self, tracer: "Tracer") -> None:
+        """Attach a tracer to this executor, None detaches it"""
+        self.tracer = tracer
+
+    def reset_stats(self) -> None:
+        self.counters = ExecutorStats()
+
+    def stats(self) -> ExecutorStats:
+        """Snapshot of the counters since the last reset_stats() (they survive
+        reset()) and of the live partial matches per DST state"""
+        snapshot = ExecutorStats(**self.counters.to_dict())
+        for conf in getattr(self, "S", ()):
+            name = conf.q.name
+            snapshot.partial_matches[name] = snapshot.partial_matches.get(name, 0) + 1
+        return snapshot
 
     def reset(self):
-        self.S = []
+        self.S: list[Configuration] = []
+        # scratch list swapped with S on every feed, so buffers are reused
+        self._T: list[Configuration] = []
         self.i = 0
-
-    def current_tuple(self, conf: Configuration) -> tuple[int, Configuration]:
-        return tuple((self.i, conf))
+        if self.delta is not None:
+            self.delta.reset()
+
+    def guarded(self, batch: "EventBatch") -> Iterator[Event]:
+        """Events of batch, its vectorizable guards evaluated up front. Each
+        event must be fed before the next one is taken."""
+        self._guards = batch.guards(self.dst)
+        try:
+            for row, event in enumerate(batch):
+                self._row = row
+                yield event
+        finally:
+            self._guards = None
 
     def feed(self, event: Event) -> Stream[Match]:
-        logger.debug("Feed with %s", event)
         dst = self.dst
+        edges = dst.edges
+        edge_offsets = dst.edge_offsets
+        tracer = self.tracer
+        counters = self.counters
+        guards, row = self._guards, self._row
+        tried = fired = 0
         self.i += 1
-
-        T = self.S.copy()
-        self.S.clear()
-        T.append(self.current_tuple(dst.initial_configuration()))
-
-        i = 0
-        n = len(T)
-        while i < n:
-            k, conf = T[i]
-            logger.debug("current T: %s", T)
-            logger.debug("At %d, %s", k, conf)
-            i += 1
-
-            q = conf.get_state()
-            for edge in dst.start_from(q):
-                logger.debug("trying edge %s", edge)
-                if edge.predict(conf, event):
-                    new_conf = edge.advance(conf, event)
-                    logger.debug("now go ahead %s", new_conf)
-                    new_tuple = (k, new_conf)
+        taken = self.i if self.output_positions else None
+
+        if tracer is not None:
+            tracer.feed_begin(event)
+
+        T = self.S
+        S = self.S = self._T
+        # events that cannot begin a match spawn no initial configuration
+        if dst.may_start(event, guards, row):
+            init = dst.initial_configuration(self.i)
+            T.append(init)
+            if tracer is not None:
+                tracer.configuration_created(init)
+        else:
+            counters.starts_skipped += 1
+
+        # configurations reached by epsilon transitions are explored depth-first
+        # right after the configuration they come from
+        stack: list[Configuration] = []
+        for conf in T:
+            if tracer is not None:
+                tracer.span_begin("expand")
+            stack.append(conf)
+            while stack:
+                conf = stack.pop()
+                qid = conf.q.id
+                begin, end = edge_offsets[qid], edge_offsets[qid + 1]
+                tried += end - begin
+                for j in range(begin, end):
+                    edge = edges[j]
+                    if tracer is not None:
+                        tracer.edge_tried(conf, edge, event)
+                    guard = None if guards is None else guards[j]
+                    if guard is not None:
+                        # a vectorized guard counts as evaluated per event
+                        p = edge.p
+                        if not p.trivial and p.ev_type == event.type:
+                            counters.predicate_evaluations += 1
+                        if not guard[row]:
+                            continue
+                    elif not edge.predict(conf, event, counters):
+                        continue
+                    new_conf = edge.advance(conf, event, taken)
+                    fired += 1
+                    if tracer is not None:
+                        tracer.edge_fired(conf, edge, event, new_conf)
+                        if new_conf is not conf:
+                            tracer.configuration_created(new_conf)
                     if edge.is_epsilon():
-                        T.insert(i, new_tuple)
-                        logger.debug("epsilon to %s with %s", new_tuple, edge)
-                        n += 1
-                    else:
-                        self.S.append(new_tuple)
-                        logger.debug("consume to %s with %s", new_tuple, edge)
-                        dig = dst.find_accepted(new_conf)
-                        if dig is not None:
-                            self.S.append((k, dig))
-                            logger.debug("found accepted %s", dig)
+                        counters.epsilon_expansions += 1
+                        stack.append(new_conf)
+                        continue
+                    S.append(new_conf)
+                    # ignoring leaves last_take unset, nothing to accept
+                    if not edge.is_take():
+                        continue
+                    if tracer is not None:
+                        tracer.span_begin("find_accepted")
+                    dig = dst.find_accepted(new_conf, counters)
+                    if tracer is not None:
+                        tracer.span_end("find_accepted")
+                    if dig is not None:
+                        S.append(dig)
+                        if tracer is not None:
+                            tracer.configuration_created(dig)
+            if tracer is not None:
+                tracer.span_end("expand")
+        T.clear()
+        self._T = T
+        counters.events_fed += 1
+        counters.edges_tried += tried
+        counters.edges_fired += fired
 
         out = Stream()
         lazy_delete = dict()
-        for k, conf in self.S:
+        for conf in S:
+            k = conf.start
             if k in lazy_delete:
                 continue
             if dst.accept(conf):
-                out.append(dst.output(conf))
-                logger.debug("accept %d, %s", k, conf)
+                match = dst.output(conf)
+                if self.delta is not None:
+                    match = self.delta.encode(match, k)
+                out.append(match)
+                if tracer is not None:
+                    tracer.match_emitted(conf, match)
 
                 if self.strategy == "NoSkip":
                     pass
                 elif self.strategy == "SkipToNext":
-                    logger.debug("Prune partial matches started at %d", k)
                     lazy_delete[k] = True
                 elif self.strategy == "SkipPastLastEvent":
-                    logger.debug("Prune all partial matches")
-                    self.S.clear()
+                    if tracer is not None:
+                        tracer.span_begin("prune")
+                        for pruned in S:
+                            tracer.configuration_pruned(pruned, self.strategy)
+                    self._count_pruned(len(S))
+                    S.clear()
+                    if tracer is not None:
+                        tracer.span_end("prune")
                     break
                 else:
                     raise ValueError("Unknown strategy: {}".format(self.strategy))
 
-        self.S = [(k, conf) for k, conf in self.S if k not in lazy_delete]
-
-        logger.debug("total out: %s", out)
+        if lazy_delete:
+            if tracer is not None:
+                tracer.span_begin("prune")
+                for conf in S:
+                    if conf.start in lazy_delete:
+                        tracer.configuration_pruned(conf, self.strategy)
+            kept = [conf for conf in S if conf.start not in lazy_delete]
+            self._count_pruned(len(S) - len(kept))
+            S[:] = kept
+            if tracer is not None:
+                tracer.span_end("prune")
+
+        counters.matches_emitted += len(out)
+        if tracer is not None:
+            tracer.feed_end(event, S, out)
         return out
+
+    def _count_pruned(self, n: int) -> None:
+        pruned = self.counters.matches_pruned
+        pruned[self.strategy] = pruned.get(self.strategy, 0) + n
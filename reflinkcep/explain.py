@@ -0,0 +1,263 @@
+"""Static cost analysis of queries.
+
+The analysis bounds how many partial matches a single start event can fan out
+to after N further events, from the contiguity and quantifiers of each
+pattern, and multiplies it by the number of starts that can be alive at once.
+Selectivities of the pattern conditions can be calibrated on a sample stream,
+otherwise every condition is assumed to always hold.
+"""
+
+import argparse
+import math
+import warnings
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+
+from reflinkcep.ast import AST, ROOT_PATH, Query, ast_repr, pattern_nodes
+from reflinkcep.compile import compile_impl
+from reflinkcep.DST import Configuration, Predicte, data_env
+from reflinkcep.event import EventStream
+
+DEFAULT_WINDOW = 100
+
+
+class QueryCostWarning(UserWarning):
+    pass
+
+
+class QueryCostError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Growth:
+    """Partial matches per start as a function of the events N seen since:
+    O(1) for degree 0, O(N^degree), or O(2^N) when exponential"""
+
+    degree: int = 0
+    exponential: bool = False
+
+    def __mul__(self, other: "Growth") -> "Growth":
+        if self.exponential or other.exponential:
+            return EXPONENTIAL
+        return Growth(self.degree + other.degree)
+
+    def __pow__(self, times: int) -> "Growth":
+        return EXPONENTIAL if self.exponential else Growth(self.degree * times)
+
+    def __str__(self) -> str:
+        if self.exponential:
+            return "O(2^N)"
+        if self.degree == 0:
+            return "O(1)"
+        if self.degree == 1:
+            return "O(N)"
+        return "O(N^{})".format(self.degree)
+
+
+BOUNDED = Growth()
+EXPONENTIAL = Growth(exponential=True)
+
+
+def _pow(base: float, exp: float) -> float:
+    try:
+        return math.pow(base, exp)
+    except OverflowError:
+        return math.inf
+
+
+@dataclass
+class NodeCost:
+    path: str
+    pattern: str
+    growth: Growth
+    selectivity: float
+    # estimated partial matches per start after `window` events
+    estimate: float
+
+
+@dataclass
+class Explanation:
+    query: Query
+    states: int
+    edges: int
+    window: int
+    # whether partial matches can wait on ignored events, so that every
+    # event of the window may still be the start of a live match
+    waits: bool
+    growth: Growth
+    estimate: float  # estimated live partial matches after `window` events
+    nodes: list[NodeCost] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        lines = [
+            repr(self.query),
+            "states: {}, edges: {}".format(self.states, self.edges),
+            "live partial matches: {}{}, ~{:.4g} after {} events".format(
+                self.growth,
+                "" if self.waits else " (starts die within the pattern length)",
+                self.estimate,
+                self.window,
+            ),
+            "{:<16} {:>8} {:>6} {:>10}  {}".format(
+                "node", "growth", "sel", "per start", "pattern"
+            ),
+        ]
+        for node in self.nodes:
+            lines.append(
+                "{:<16} {:>8} {:>6.3f} {:>10.4g}  {}".format(
+                    node.path,
+                    str(node.growth),
+                    node.selectivity,
+                    node.estimate,
+                    node.pattern,
+                )
+            )
+        return "\n".join(lines)
+
+    def check_budget(self, budget: float, refuse: bool = False) -> None:
+        """Warn, or raise QueryCostError if refuse, when over budget"""
+        if budget is None or self.estimate <= budget:
+            return
+        message = "{} exceeds the cost budget: ~{:.4g} > {:.4g}".format(
+            repr(self.query), self.estimate, budget
+        )
+        if refuse:
+            raise QueryCostError(message)
+        warnings.warn(message, QueryCostWarning, stacklevel=2)
+
+
+class CostAnalyzer:
+    def __init__(self, selectivities: dict[str, float], window: int) -> None:
+        self.selectivities = selectivities
+        self.window = window
+        self.nodes: list[NodeCost] = []
+
+    def analyze(self, ast: AST, path: str) -> tuple[Growth, float, bool, int]:
+        """(growth, estimate) per start, whether it can wait on ignored
+        events, and the least events a match takes"""
+        kind = ast["type"]
+        W = self.window
+        if kind in ("spat", "lpat", "lpat-inf"):
+            sel = self.selectivities.get(path, 1.0)
+            N = sel * W
+            if kind == "spat":
+                growth, estimate, waits, length = BOUNDED, 1.0, False, 1
+            else:
+                theta = ast["loop"]["contiguity"]
+                length = max(ast["loop"]["from"], 1)
+                waits = theta != "strict"
+                if theta != "nd-relaxed":
+                    growth, estimate = BOUNDED, 1.0
+                elif kind == "lpat":
+                    # choose the other m - 1 events among the matching ones
+                    m = ast["loop"]["to"]
+                    growth = Growth(m - 1)
+                    estimate = _pow(1 + N, m - 1)
+                else:
+                    growth, estimate = EXPONENTIAL, _pow(2, N)
+            self.nodes.append(NodeCost(path, ast_repr(ast), growth, sel, estimate))
+            return growth, estimate, waits, length
+
+        if kind == "combine":
+            lg, lest, lw, ll = self.analyze(ast["left"], path + ".left")
+            rg, rest, rw, rl = self.analyze(ast["right"], path + ".right")
+            growth, estimate = lg * rg, lest * rest
+            if ast["contiguity"] == "nd-relaxed":
+                # every later match of the right pattern may start it
+                sel = self.selectivities.get(path + ".right", 1.0)
+                growth, estimate = growth * Growth(1), estimate * (1 + sel * W)
+            waits = lw or rw or ast["contiguity"] != "strict"
+            return growth, estimate, waits, ll + rl
+
+        if kind == "gpat":
+            return self.analyze(ast["child"], path + ".child")
+
+        if kind in ("gpat-times", "gpat-inf"):
+            child = self.analyze(ast["child"], path + ".child")
+            growth, estimate, waits, length = child
+            if kind == "gpat-times":
+                times = ast["loop"]["to"]
+                growth, estimate = growth**times, _pow(estimate, times)
+            elif growth != BOUNDED:
+                # any number of iterations, each fanning out again
+                growth, estimate = EXPONENTIAL, _pow(estimate, W / length)
+            return growth, estimate, waits, length * max(ast["loop"]["from"], 1)
+
+        raise ValueError("Not supported AST node {}".format(kind))
+
+
+def calibrate(query: Query, sample: EventStream) -> dict[str, float]:
+    """Fraction of sample events matching each pattern's condition, evaluated
+    with the initial values of the pattern variables"""
+    sample = list(sample)
+    selectivities = dict()
+    for path, ast in pattern_nodes(query.patseq):
+        pred = Predicte(ast["event"], ast["cndt"])
+        variables = ast.get("variables", {})
+        eta = dict((k, v["initial"]) for k, v in variables.items())
+        conf = Configuration(None, data_env(eta), {})
+        hits = sum(1 for event in sample if pred.evaluate(conf, event))
+        selectivities[path] = hits / len(sample) if sample else 1.0
+    return selectivities
+
+
+def explain(
+    query: Query,
+    window: int = DEFAULT_WINDOW,
+    sample: EventStream = None,
+    budget: float = None,
+    refuse: bool = False,
+) -> Explanation:
+    """Compile query and estimate its live partial matches after `window`
+    events, optionally calibrated on a sample stream and checked against a
+    budget"""
+    dst, _ = compile_impl(query.patseq, query.context)
+    selectivities = calibrate(query, sample) if sample is not None else {}
+    analyzer = CostAnalyzer(selectivities, window)
+    growth, estimate, waits, length = analyzer.analyze(query.patseq, ROOT_PATH)
+
+    if waits:
+        # a start per matching event of the first pattern may still be alive
+        first = next(pattern_nodes(query.patseq))[0]
+        starts = max(selectivities.get(first, 1.0) * window, 1)
+        growth = growth * Growth(1)
+    else:
+        starts = length
+    explanation = Explanation(
+        query,
+        len(dst.states),
+        len(dst.edges),
+        window,
+        waits,
+        growth,
+        starts * estimate,
+        analyzer.nodes,
+    )
+    explanation.check_budget(budget, refuse)
+    return explanation
+
+
+def main(argv: Iterable[str] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m reflinkcep.explain",
+        description="Estimate the partial-match growth of YAML queries",
+    )
+    parser.add_argument("queries", type=Path, nargs="+", help="YAML query files")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW)
+    parser.add_argument("--budget", type=float, help="max estimated partial matches")
+    parser.add_argument(
+        "--refuse", action="store_true", help="fail instead of warning over budget"
+    )
+    args = parser.parse_args(argv)
+
+    for path in args.queries:
+        with open(path) as f:
+            query = Query.from_yaml(f, path.stem)
+        print(explain(query, args.window, budget=args.budget, refuse=args.refuse))
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Graphviz (DOT) export of compiled DSTs, optionally with runtime hit counts"""
+
+import argparse
+import math
+from pathlib import Path
+from typing import Iterable
+
+from reflinkcep.ast import Query
+from reflinkcep.compile import compile
+from reflinkcep.DST import DST, Configuration, Transition
+from reflinkcep.event import Event, Stream
+from reflinkcep.executor import Match
+from reflinkcep.trace import Tracer
+
+
+class HitCountTracer(Tracer):
+    """Counts how often each edge fires and the peak of live partial matches
+    per state, indexed by edge and state ids of `dst`"""
+
+    def __init__(self, dst: DST) -> None:
+        self.edge_hits = [0] * len(dst.edges)
+        self.state_peaks = [0] * len(dst.states)
+
+    def edge_fired(
+        self,
+        conf: Configuration,
+        edge: Transition,
+        event: Event,
+        new_conf: Configuration,
+    ) -> None:
+        self.edge_hits[edge.id] += 1
+
+    def feed_end(
+        self, event: Event, partial_matches: list[Configuration], out: Stream[Match]
+    ) -> None:
+        live = [0] * len(self.state_peaks)
+        for conf in partial_matches:
+            live[conf.q.id] += 1
+        self.state_peaks = list(map(max, self.state_peaks, live))
+
+
+def _quote(text: str) -> str:
+    text = str(text).replace("\\", "\\\\").replace('"', '\\"')
+    return '"{}"'.format(text.replace("\n", "\\n"))
+
+
+def _heat(value: int, top: int) -> str:
+    """White to red on a log scale"""
+    if top <= 0 or value <= 0:
+        return "#ffffff"
+    level = math.log1p(value) / math.log1p(top)
+    other = int(255 * (1 - level))
+    return "#ff{:02x}{:02x}".format(other, other)
+
+
+def edge_label(edge: Transition) -> str:
+    if edge.is_epsilon():
+        return "ε"
+    label = "{}[{}]".format(edge.p.ev_type, edge.p.cndt["expr"])
+    if edge.is_take():
+        label += " / {}+=e".format(edge.beta.sink)
+    return label
+
+
+def to_dot(
+    dst: DST,
+    edge_hits: list[int] = None,
+    state_peaks: list[int] = None,
+    name: str = "dst",
+) -> str:
+    """Render dst in DOT. Take edges are solid, ignore edges dashed, epsilon
+    edges dotted. With edge_hits/state_peaks (indexed by edge/state id) edges
+    are labelled and weighted by hit count and states by their live peak."""
+    top_hits = max(edge_hits, default=0) if edge_hits is not None else 0
+    top_peak = max(state_peaks, default=0) if state_peaks is not None else 0
+
+    lines = [
+        "digraph {} {{".format(_quote(name)),
+        "  rankdir=LR;",
+        '  node [shape=circle, style=filled, fillcolor="#ffffff"];',
+        "  start [shape=point];",
+        "  start -> q{};".format(dst.q0.id),
+    ]
+    for q in dst.states:
+        attrs = ["label={}".format(_quote(q.name))]
+        if q.out is not None:
+            attrs.append("shape=doublecircle")
+        if state_peaks is not None:
+            peak = state_peaks[q.id]
+            attrs[0] = "label={}".format(_quote("{}\npeak {}".format(q.name, peak)))
+            attrs.append("fillcolor={}".format(_quote(_heat(peak, top_peak))))
+        lines.append("  q{} [{}];".format(q.id, ", ".join(attrs)))
+
+    for edge in dst.edges:
+        label = edge_label(edge)
+        attrs = []
+        if edge.is_epsilon():
+            attrs.append("style=dotted")
+        elif not edge.is_take():
+            attrs.append("style=dashed")
+        if edge_hits is not None:
+            hits = edge_hits[edge.id]
+            label = "{} ×{}".format(label, hits)
+            if hits:
+                width = 1 + 4 * math.log1p(hits) / math.log1p(top_hits)
+                attrs.append("color={}".format(_quote(_heat(hits, top_hits))))
+                attrs.append("penwidth={:.1f}".format(width))
+            else:
+                attrs.append('color="#bbbbbb"')
+        attrs.insert(0, "label={}".format(_quote(label)))
+        lines.append(
+            "  q{} -> q{} [{}];".format(edge.q1.id, edge.q2.id, ", ".join(attrs))
+        )
+
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: Iterable[str] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m reflinkcep.graph",
+        description="Print the compiled DST of a YAML query in DOT format",
+    )
+    parser.add_argument("query", type=Path, help="YAML query file")
+    args = parser.parse_args(argv)
+
+    with open(args.query) as f:
+        query = Query.from_yaml(f, args.query.stem)
+    print(to_dot(compile(query).dst, name=args.query.stem), end="")
+
+
+if __name__ == "__main__":
+    main()
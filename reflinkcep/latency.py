@@ -0,0 +1,118 @@
+"""Per-event latency recording of an operator"""
+
+import json
+from array import array
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from reflinkcep.event import Event
+
+# each power of two is split into 2 ** SUB_BITS buckets, ~9% relative error
+SUB_BITS = 3
+SUB_MASK = (1 << SUB_BITS) - 1
+MAX_BITS = 40  # ~18 minutes in ns, longer durations share the last bucket
+
+
+def _bucket(ns: int) -> int:
+    bits = ns.bit_length()
+    if bits <= SUB_BITS:
+        return ns
+    shift = min(bits, MAX_BITS) - SUB_BITS - 1
+    if bits > MAX_BITS:
+        return ((shift + 1) << SUB_BITS) + SUB_MASK
+    return ((shift + 1) << SUB_BITS) + ((ns >> shift) & SUB_MASK)
+
+
+def _bucket_upper(index: int) -> int:
+    if index <= SUB_MASK:
+        return index
+    shift = (index >> SUB_BITS) - 1
+    return (((1 << SUB_BITS) + (index & SUB_MASK) + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram of durations in ns, with fixed memory"""
+
+    def __init__(self) -> None:
+        self.counts = array("Q", bytes(8 * (_bucket((1 << MAX_BITS) - 1) + 1)))
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns: int) -> None:
+        self.counts[_bucket(ns)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def quantile(self, q: float) -> int:
+        """Upper bound of the bucket holding the q-quantile, in ns"""
+        if self.count == 0:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return min(_bucket_upper(index), self.max_ns)
+        return self.max_ns
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ns": self.total_ns / self.count if self.count else 0,
+            "p50_ns": self.quantile(0.5),
+            "p99_ns": self.quantile(0.99),
+            "p999_ns": self.quantile(0.999),
+            "max_ns": self.max_ns,
+        }
+
+
+def event_to_dict(event: Event) -> dict:
+    return {"type": event.type, "attrs": dict(event.get_attrs())}
+
+
+@dataclass
+class SlowEvent:
+    position: int  # stream position, as counted by the executor
+    event: Event
+    elapsed_ns: int
+    partial_matches_before: int
+    partial_matches_after: int
+    matches: int
+    # events fed right before this one, oldest first
+    history: list[Event] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "position": self.position,
+            "event": event_to_dict(self.event),
+            "elapsed_ns": self.elapsed_ns,
+            "partial_matches_before": self.partial_matches_before,
+            "partial_matches_after": self.partial_matches_after,
+            "matches": self.matches,
+            "history": [event_to_dict(e) for e in self.history],
+        }
+
+
+class LatencyRecorder:
+    """Histogram of feed latencies plus the last `capacity` slow events"""
+
+    def __init__(
+        self, slow_ns: int = None, capacity: int = 100, history: int = 0
+    ) -> None:
+        self.histogram = LatencyHistogram()
+        self.slow_ns = slow_ns
+        self.slow_events: deque[SlowEvent] = deque(maxlen=capacity)
+        self.history: deque[Event] = deque(maxlen=history)
+
+    def dump_slow_events(self, path: Path, query=None) -> None:
+        """Write slow events as JSON lines, with the query to replay them"""
+        with open(path, "w") as f:
+            for slow in self.slow_events:
+                record = slow.to_dict()
+                if query is not None:
+                    record["query"] = {"patseq": query.patseq, "context": query.context}
+                f.write(json.dumps(record) + "\n")
@@ -0,0 +1,168 @@
+"""Memory breakdown of the state retained by an executor.
+
+Partial matches share their data environments, contexts and streams with
+their predecessors, so every object is sized once, by the first configuration
+of `Executor.S` that reaches it. The per-state numbers are therefore the bytes
+a state's configurations hold on top of the ones sized before them.
+"""
+
+import sys
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from reflinkcep.DST import Configuration, State
+from reflinkcep.executor import Executor
+from reflinkcep.operator import CEPOperator
+
+CATEGORIES = ("configurations", "contexts", "events", "data_envs", "output")
+
+PACKAGE_DIR = str(Path(__file__).parent)
+
+
+def _sizeof(obj, seen: set[int]) -> int:
+    """Deep size of obj in bytes, skipping objects already in seen. DST states
+    and types belong to the compiled query and are never counted."""
+    total = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (State, type)):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            if hasattr(obj, "__dict__"):
+                stack.append(obj.__dict__)
+            for name in _slots(type(obj)):
+                value = getattr(obj, name, None)
+                if value is not None:
+                    stack.append(value)
+    return total
+
+
+_slot_names: dict[type, tuple[str, ...]] = {}
+
+
+def _slots(cls: type) -> tuple[str, ...]:
+    """Names of the slots of cls and its bases, as CompactEvent, EventView and
+    Configuration hold their data in slots rather than a __dict__"""
+    names = _slot_names.get(cls)
+    if names is None:
+        names = []
+        for base in cls.__mro__:
+            slots = base.__dict__.get("__slots__", ())
+            if isinstance(slots, str):
+                slots = (slots,)
+            names.extend(n for n in slots if n not in ("__dict__", "__weakref__"))
+        names = _slot_names[cls] = tuple(names)
+    return names
+
+
+def _shallow(obj, seen: set[int]) -> int:
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    return sys.getsizeof(obj)
+
+
+@dataclass
+class MemoryReport:
+    # category -> bytes retained, see CATEGORIES
+    categories: dict[str, int] = field(default_factory=dict)
+    # state name -> live partial matches and bytes they retain
+    partial_matches: dict[str, int] = field(default_factory=dict)
+    state_bytes: dict[str, int] = field(default_factory=dict)
+    # "file:line" -> bytes still allocated there by reflinkcep, largest first,
+    # only when tracemalloc is tracing
+    traced: dict[str, int] = None
+
+    @property
+    def total(self) -> int:
+        return sum(self.categories.values())
+
+    def to_dict(self) -> dict:
+        return asdict(self) | {"total": self.total}
+
+    def __str__(self) -> str:
+        lines = ["retained: {} bytes".format(self.total)]
+        for name in CATEGORIES:
+            lines.append("  {:<16} {:>12}".format(name, self.categories[name]))
+        lines.append("per state:")
+        for name, size in sorted(self.state_bytes.items(), key=lambda x: -x[1]):
+            lines.append(
+                "  {:<16} {:>12} ({} partial matches)".format(
+                    name, size, self.partial_matches[name]
+                )
+            )
+        if self.traced is not None:
+            lines.append("traced allocations:")
+            for where, size in self.traced.items():
+                lines.append("  {:<40} {:>12}".format(where, size))
+        return "\n".join(lines)
+
+
+def _size_configuration(conf: Configuration, seen: set[int], sizes: dict[str, int]):
+    sizes["configurations"] += _shallow(conf, seen)
+    sizes["data_envs"] += _sizeof(conf.eta, seen)
+    ctx = conf.ctx
+    sizes["contexts"] += _shallow(ctx, seen)
+    for variable, stream in ctx.items():
+        sizes["contexts"] += _sizeof(variable, seen) + _shallow(stream, seen)
+        for event in stream:
+            sizes["events"] += _sizeof(event, seen)
+
+
+def _traced(limit: int) -> dict[str, int]:
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(True, PACKAGE_DIR + "/*")]
+    )
+    traced = dict()
+    for stat in snapshot.statistics("lineno")[:limit]:
+        frame = stat.traceback[0]
+        traced["{}:{}".format(Path(frame.filename).name, frame.lineno)] = stat.size
+    return traced
+
+
+def memory_report(target: Executor | CEPOperator, traced: int = 10) -> MemoryReport:
+    """Attribute the bytes retained by an executor, or an operator and its
+    executor, to categories and DST states. Can be called at any time, e.g.
+    between two feeds. If tracemalloc is tracing, the `traced` reflinkcep
+    lines holding the most memory are reported too."""
+    operator = target if isinstance(target, CEPOperator) else None
+    executor = operator.executor if operator is not None else target
+
+    seen: set[int] = set()
+    sizes = dict.fromkeys(CATEGORIES, 0)
+    report = MemoryReport(categories=sizes)
+
+    partial_matches = []
+    if hasattr(executor, "S"):  # set by the first reset()
+        partial_matches = executor.S
+        sizes["configurations"] += _shallow(partial_matches, seen)
+        sizes["configurations"] += _shallow(executor._T, seen)
+    for conf in partial_matches:
+        before = sum(sizes.values())
+        _size_configuration(conf, seen, sizes)
+        name = conf.q.name
+        report.partial_matches[name] = report.partial_matches.get(name, 0) + 1
+        report.state_bytes[name] = (
+            report.state_bytes.get(name, 0) + sum(sizes.values()) - before
+        )
+
+    events = getattr(operator, "events", None)
+    if events is not None:
+        sizes["events"] += _sizeof(events, seen)
+
+    output = getattr(operator, "output", None)
+    if output is not None:
+        sizes["output"] = _sizeof(output, seen)
+
+    if tracemalloc.is_tracing():
+        report.traced = _traced(traced)
+    return report
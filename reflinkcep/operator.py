@@ -1,20 +1,126 @@
+from time import perf_counter_ns
+from typing import TYPE_CHECKING
+
 from reflinkcep.ast import Query
+from reflinkcep.batch import EventBatch
 from reflinkcep.compile import compile
-from reflinkcep.event import Event, EventStream, Stream
+from reflinkcep.delta import CAPACITY, DeltaEncoder
+from reflinkcep.event import Event, EventBuffer, EventStream, Stream
 from reflinkcep.executor import Executor, Match, MatchStream
+from reflinkcep.latency import LatencyRecorder, SlowEvent
+
+if TYPE_CHECKING:
+    from reflinkcep.sinks import MatchSink
 
 
 class CEPOperator:
     @staticmethod
     def from_query(query: Query):
-        return CEPOperator(compile(query))
+        operator = CEPOperator(compile(query))
+        operator.query = query
+        return operator
 
     def __init__(self, executor: Executor) -> None:
         self.executor = executor
+        self.query: Query = None
+        self.latency: LatencyRecorder = None
+        # matches collected by the running `<<`, None outside of it
+        self.output: Stream[Match] = None
+        # events retained to resolve position matches, see use_positions
+        self.events: EventBuffer = None
 
-    def __lshift__(self, input: EventStream) -> Stream[Match]:
+    def record_latency(
+        self, slow_ms: float = None, capacity: int = 100, history: int = 0
+    ) -> LatencyRecorder:
+        """Record the latency of every feed from now on. Feeds slower than
+        slow_ms are kept (up to capacity of them) with the `history` events
+        fed before them."""
+        slow_ns = None if slow_ms is None else int(slow_ms * 1e6)
+        self.latency = LatencyRecorder(slow_ns, capacity, history)
+        return self.latency
+
+    def use_positions(self, buffer: EventBuffer = None) -> None:
+        """Output matches as the stream positions of their events
+        (`PositionMatch`) from now on. Fed events are retained in buffer, if
+        given, for `buffer.resolve` to turn matches back into events."""
+        self.executor.output_positions = True
+        self.events = buffer
+
+    def use_deltas(self, capacity: int = CAPACITY) -> None:
+        """Output matches as `DeltaMatch`es from now on, each extending the
+        last match from the same start when it can, for the last `capacity`
+        starts"""
+        self.executor.delta = DeltaEncoder(capacity)
+
+    def feed(self, event: Event) -> Stream[Match]:
+        if self.events is not None:
+            self.events.append(event)
+        latency = self.latency
+        if latency is None:
+            return self.executor.feed(event)
+
+        before = len(self.executor.S)
+        start = perf_counter_ns()
+        out = self.executor.feed(event)
+        elapsed = perf_counter_ns() - start
+
+        latency.histogram.record(elapsed)
+        if latency.slow_ns is not None and elapsed >= latency.slow_ns:
+            latency.slow_events.append(
+                SlowEvent(
+                    self.executor.i,
+                    event,
+                    elapsed,
+                    before,
+                    len(self.executor.S),
+                    len(out),
+                    list(latency.history),
+                )
+            )
+        if latency.history.maxlen:
+            latency.history.append(event)
+        return out
+
+    def _events(self, input: EventStream) -> EventStream:
+        if isinstance(input, EventBatch):
+            return self.executor.guarded(input)
+        return input
+
+    def reset(self) -> None:
         self.executor.reset()
-        output = Stream()
-        for event in input:
-            output.extend(self.executor.feed(event))
+        if self.events is not None:
+            self.events.clear()
+
+    def __lshift__(self, input: EventStream) -> Stream[Match]:
+        self.reset()
+        output = self.output = Stream()
+        try:
+            for event in self._events(input):
+                output.extend(self.feed(event))
+        finally:
+            self.output = None
         return output
+
+    def run(self, input: EventStream, *sinks: "MatchSink") -> int:
+        """Like `<<`, but the matches of every event are handed to sinks
+        instead of being collected. Returns how many matches were produced;
+        sinks are flushed, not closed."""
+        if self.executor.delta is not None:
+            for sink in sinks:
+                if not sink.deltas:
+                    raise ValueError(
+                        "{} does not take delta matches".format(type(sink).__name__)
+                    )
+        self.reset()
+        count = 0
+        try:
+            for event in self._events(input):
+                out = self.feed(event)
+                if out:
+                    count += len(out)
+                    for sink in sinks:
+                        sink.emit(self.executor.i, out)
+        finally:
+            for sink in sinks:
+                sink.flush()
+        return count
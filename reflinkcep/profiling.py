@@ -0,0 +1,98 @@
+"""Cost attribution of a running query to the AST nodes of its pattern"""
+
+from dataclasses import dataclass
+from time import perf_counter_ns
+
+from reflinkcep.ast import Query, ast_at, ast_repr
+from reflinkcep.DST import Configuration, Transition
+from reflinkcep.event import Event, EventStream, Stream
+from reflinkcep.executor import Match
+from reflinkcep.operator import CEPOperator
+from reflinkcep.trace import Tracer
+
+
+@dataclass
+class NodeCost:
+    time_ns: int = 0
+    evaluations: int = 0  # edges tried
+    fanout: int = 0  # configurations produced by firing edges
+
+
+class ProfilingTracer(Tracer):
+    """Aggregates time, evaluations and fan-out per AST node path.
+
+    The time between a callback and the next one is charged to the edge last
+    tried or fired, which covers its guard, its advance and, for takes, the
+    search for an accepted configuration."""
+
+    def __init__(self) -> None:
+        self.costs: dict[str, NodeCost] = {}
+        self._edge: Transition = None
+        self._since = 0
+
+    def _charge(self, edge: Transition) -> NodeCost:
+        now = perf_counter_ns()
+        if self._edge is not None:
+            self._cost(self._edge).time_ns += now - self._since
+        self._edge = edge
+        return self._cost(edge) if edge is not None else None
+
+    def _cost(self, edge: Transition) -> NodeCost:
+        cost = self.costs.get(edge.origin)
+        if cost is None:
+            cost = self.costs[edge.origin] = NodeCost()
+        return cost
+
+    def feed_begin(self, event: Event) -> None:
+        self._edge = None
+
+    def feed_end(
+        self, event: Event, partial_matches: list[Configuration], out: Stream[Match]
+    ) -> None:
+        self._charge(None)
+
+    def edge_tried(self, conf: Configuration, edge: Transition, event: Event) -> None:
+        self._charge(edge).evaluations += 1
+        self._since = perf_counter_ns()
+
+    def edge_fired(
+        self,
+        conf: Configuration,
+        edge: Transition,
+        event: Event,
+        new_conf: Configuration,
+    ) -> None:
+        self._charge(edge).fanout += 1
+        self._since = perf_counter_ns()
+
+    def report(self, query: Query) -> str:
+        total = sum(cost.time_ns for cost in self.costs.values()) or 1
+        lines = [
+            repr(query),
+            "{:<24} {:>8} {:>12} {:>10} {:>10}  {}".format(
+                "node", "time %", "time ms", "evals", "fan-out", "pattern"
+            ),
+        ]
+        for path, cost in sorted(
+            self.costs.items(), key=lambda kv: kv[1].time_ns, reverse=True
+        ):
+            lines.append(
+                "{:<24} {:>8.1f} {:>12.3f} {:>10} {:>10}  {}".format(
+                    path,
+                    100 * cost.time_ns / total,
+                    cost.time_ns / 1e6,
+                    cost.evaluations,
+                    cost.fanout,
+                    ast_repr(ast_at(query.patseq, path)),
+                )
+            )
+        return "\n".join(lines)
+
+
+def profile_query(query: Query, input: EventStream) -> tuple[Stream[Match], str]:
+    """Run query over input in profiling mode, returning matches and the report"""
+    operator = CEPOperator.from_query(query)
+    tracer = ProfilingTracer()
+    operator.executor.set_tracer(tracer)
+    output = operator << input
+    return output, tracer.report(query)
@@ -0,0 +1,146 @@
+"""Streaming event readers.
+
+Files are read in chunks of `chunk_size` characters, so memory stays
+constant whatever the file size. With a query schema only the attributes
+the query can refer to are decoded; events of types missing from the schema
+are kept, without attributes, as they still matter to contiguity, and
+events are decoded into schema-backed `CompactEvent`s. Plain
+files can be followed as they grow, like `tail -f`.
+"""
+
+import csv
+import json
+import time
+from pathlib import Path
+from typing import IO, Iterator
+
+from reflinkcep.event import Event, EventSchema
+from reflinkcep.eventlog import open_text, read_event_log
+
+CHUNK_SIZE = 1 << 20
+POLL_INTERVAL = 0.1
+
+Schema = dict[str, list[str]]
+
+
+def _lines(
+    f: IO[str],
+    chunk_size: int,
+    follow: bool,
+    poll: float,
+    idle_timeout: float,
+) -> Iterator[str]:
+    """Complete lines of f. When following, a last line without newline is
+    held back until it is completed, and reading stops only after
+    idle_timeout seconds without new data, if given"""
+    pending = ""
+    idle_since = None
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            if not follow:
+                if pending:
+                    yield pending
+                return
+            now = time.monotonic()
+            idle_since = idle_since or now
+            if idle_timeout is not None and now - idle_since >= idle_timeout:
+                return
+            time.sleep(poll)
+            continue
+        idle_since = None
+        lines = (pending + chunk).split("\n")
+        pending = lines.pop()
+        yield from lines
+
+
+def _open(path: Path, follow: bool) -> IO[str]:
+    if follow and Path(path).suffix in (".gz", ".xz"):
+        raise ValueError("Cannot follow compressed file {}".format(path))
+    return open_text(path)
+
+
+def read_jsonl(
+    path: Path,
+    schema: Schema = None,
+    follow: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+    poll: float = POLL_INTERVAL,
+    idle_timeout: float = None,
+) -> Iterator[Event]:
+    """Events of a file of {"type": ..., "attrs": {...}} lines, see
+    reflinkcep.eventlog.write_jsonl"""
+    decode = json.JSONDecoder().decode
+    compact = None if schema is None else EventSchema(schema).event
+    with _open(path, follow) as f:
+        for line in _lines(f, chunk_size, follow, poll, idle_timeout):
+            if not line.strip():
+                continue
+            record = decode(line)
+            if compact is None:
+                yield Event(record["type"], record["attrs"])
+            else:
+                yield compact(record["type"], record["attrs"])
+
+
+def read_csv(
+    path: Path,
+    schema: Schema = None,
+    follow: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+    poll: float = POLL_INTERVAL,
+    idle_timeout: float = None,
+    type_column: str = "type",
+) -> Iterator[Event]:
+    """Events of a CSV file with a header row, the event type in
+    `type_column` and int attributes in the other columns. Empty cells are
+    attributes the event does not have."""
+    with _open(path, follow) as f:
+        rows = csv.reader(_lines(f, chunk_size, follow, poll, idle_timeout))
+        header = next(rows, None)
+        if header is None:
+            return
+        type_index = header.index(type_column)
+        columns = [(i, name) for i, name in enumerate(header) if i != type_index]
+        event_schema = None if schema is None else EventSchema(schema)
+        # event type -> (index, name) of the columns to decode
+        decoded: dict[str, list[tuple[int, str]]] = {}
+        for row in rows:
+            if not row:
+                continue
+            ev_type = row[type_index]
+            wanted = decoded.get(ev_type)
+            if wanted is None:
+                wanted = columns
+                if schema is not None:
+                    # in schema order, so the values make a CompactEvent
+                    at = dict((name, i) for i, name in columns)
+                    wanted = [(at.get(name), name) for name in schema.get(ev_type, ())]
+                decoded[ev_type] = wanted
+            if event_schema is None:
+                yield Event(
+                    ev_type, dict((name, int(row[i])) for i, name in wanted if row[i])
+                )
+            else:
+                yield event_schema.make(
+                    ev_type,
+                    tuple(
+                        int(row[i]) if i is not None and row[i] else None
+                        for i, _ in wanted
+                    ),
+                )
+
+
+def read_events(path: Path, schema: Schema = None, **options) -> Iterator[Event]:
+    """Events of a .jsonl, .csv (both optionally .gz or .xz) or .bin file"""
+    suffixes = Path(path).suffixes
+    if suffixes and suffixes[-1] in (".gz", ".xz"):
+        suffixes = suffixes[:-1]
+    kind = suffixes[-1] if suffixes else ""
+    if kind == ".jsonl":
+        return read_jsonl(path, schema, **options)
+    if kind == ".csv":
+        return read_csv(path, schema, **options)
+    if kind == ".bin":
+        return read_event_log(path)
+    raise ValueError("Unknown event file type: {}".format(path))
@@ -0,0 +1,197 @@
+"""Match sinks, receiving the matches of an operator as they are produced.
+
+`CEPOperator.run` hands the matches of every event to its sinks instead of
+collecting them, so the result set is never held in memory. File sinks
+serialize matches into a buffer written out every `batch_size` matches.
+"""
+
+import csv
+import io
+import json
+from abc import ABC, abstractmethod
+from collections import deque
+from pathlib import Path
+from typing import Callable
+
+from reflinkcep.delta import DeltaMatch
+from reflinkcep.event import Event, EventBuffer, Stream
+from reflinkcep.eventlog import open_text
+from reflinkcep.executor import Match
+from reflinkcep.latency import event_to_dict
+
+BATCH_SIZE = 1024  # matches serialized between two writes
+
+
+class MatchSink(ABC):
+    # if the sink takes the DeltaMatches of CEPOperator.use_deltas
+    deltas = True
+
+    @abstractmethod
+    def emit(self, position: int, matches: Stream[Match]) -> None:
+        """Matches produced by the event at stream position `position`"""
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "MatchSink":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class CallbackSink(MatchSink):
+    def __init__(self, callback: Callable[[int, Match], None]) -> None:
+        self.callback = callback
+
+    def emit(self, position: int, matches: Stream[Match]) -> None:
+        for match in matches:
+            self.callback(position, match)
+
+
+class RingBufferSink(MatchSink):
+    """Keeps the last `capacity` matches with their positions"""
+
+    def __init__(self, capacity: int) -> None:
+        self.buffer: deque[tuple[int, Match]] = deque(maxlen=capacity)
+        self.count = 0
+
+    def emit(self, position: int, matches: Stream[Match]) -> None:
+        self.buffer.extend((position, match) for match in matches)
+        self.count += len(matches)
+
+    def matches(self) -> list[Match]:
+        return [match for _, match in self.buffer]
+
+
+class _FileSink(MatchSink):
+    """Matches numbered from 0, serialized into a text buffer written to a
+    file (gzip or lzma compressed for .gz and .xz paths) every batch_size
+    matches"""
+
+    def __init__(self, path: Path, batch_size: int = BATCH_SIZE) -> None:
+        self.file = open_text(path, "w")
+        self.buffer = io.StringIO()
+        self.batch_size = batch_size
+        self.count = 0
+        self._pending = 0
+
+    def emit(self, position: int, matches: Stream[Match]) -> None:
+        for match in matches:
+            self.serialize(self.count, position, match)
+            self.count += 1
+        self._pending += len(matches)
+        if self._pending >= self.batch_size:
+            self.flush()
+
+    @abstractmethod
+    def serialize(self, id: int, position: int, match: Match) -> None:
+        """Write match number id, produced at position, into the buffer"""
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        if self.buffer.tell():
+            self.file.write(self.buffer.getvalue())
+            self.buffer.seek(0)
+            self.buffer.truncate()
+        self._pending = 0
+        self.file.flush()
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+def _event_record(event: Event | int) -> dict | int:
+    return event if isinstance(event, int) else event_to_dict(event)
+
+
+class JsonlSink(_FileSink):
+    """One {"id", "position", "match"} line per match, the match mapping
+    pattern names to lists of {"type", "attrs"} events, or of stream
+    positions for position matches. Delta matches get a "base" too, their
+    "match" holding the appended events only."""
+
+    def serialize(self, id: int, position: int, match: Match) -> None:
+        record = {"id": id, "position": position}
+        if isinstance(match, DeltaMatch):
+            record["base"] = match.base
+            match = match.appended
+        record["match"] = dict(
+            (name, [_event_record(event) for event in events])
+            for name, events in match.items()
+        )
+        self.buffer.write(json.dumps(record))
+        self.buffer.write("\n")
+
+
+class CsvSink(_FileSink):
+    """One row per event of a match: match id, position, the id of the match
+    it extends for delta matches, pattern name, the event position for
+    position matches, event type, then a column per attribute of the
+    schema, empty for attributes the event does not have. Delta matches
+    only get rows for their appended events. Position matches are resolved
+    by the events of `events`; without it only their positions are written.
+    With the schema, reflinkcep.readers.read_csv reads the events back."""
+
+    COLUMNS = (
+        "match_id",
+        "match_position",
+        "match_base",
+        "match_pattern",
+        "event_position",
+        "type",
+    )
+
+    def __init__(
+        self,
+        path: Path,
+        schema: dict[str, list[str]],
+        batch_size: int = BATCH_SIZE,
+        events: EventBuffer = None,
+    ) -> None:
+        attributes = sorted(set(name for attrs in schema.values() for name in attrs))
+        clashes = set(attributes) & set(self.COLUMNS)
+        if clashes:
+            raise ValueError(
+                "Attributes clash with CSV columns: {}".format(
+                    ", ".join(sorted(clashes))
+                )
+            )
+        super().__init__(path, batch_size)
+        self.attributes = attributes
+        self.events = events
+        self.writer = csv.writer(self.buffer, lineterminator="\n")
+        self.writer.writerow([*self.COLUMNS, *self.attributes])
+
+    def serialize(self, id: int, position: int, match: Match) -> None:
+        base = ""
+        if isinstance(match, DeltaMatch):
+            base = "" if match.base is None else match.base
+            match = match.appended
+        for name, events in match.items():
+            for event in events:
+                event_position = ""
+                if isinstance(event, int):
+                    event_position = event
+                    if self.events is None:
+                        self.writer.writerow([id, position, base, name, event, ""])
+                        continue
+                    event = self.events[event]
+                attrs = event.get_attrs()
+                self.writer.writerow(
+                    [
+                        id,
+                        position,
+                        base,
+                        name,
+                        event_position,
+                        event.type,
+                        *(attrs.get(attr, "") for attr in self.attributes),
+                    ]
+                )
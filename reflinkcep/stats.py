@@ -0,0 +1,80 @@
+"""Runtime statistics of an executor"""
+
+from dataclasses import asdict, dataclass, field
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{{{}}}".format(
+        ",".join('{}="{}"'.format(k, _escape(v)) for k, v in labels.items())
+    )
+
+
+@dataclass
+class ExecutorStats:
+    events_fed: int = 0
+    edges_tried: int = 0
+    edges_fired: int = 0
+    predicate_evaluations: int = 0
+    epsilon_expansions: int = 0
+    matches_emitted: int = 0
+    # events that could not begin a match, so spawned no initial configuration
+    starts_skipped: int = 0
+    # strategy -> partial matches dropped by that after-match strategy
+    matches_pruned: dict[str, int] = field(default_factory=dict)
+    # state name -> live partial matches, only filled in snapshots
+    partial_matches: dict[str, int] = field(default_factory=dict)
+
+    COUNTERS = (
+        "events_fed",
+        "edges_tried",
+        "edges_fired",
+        "predicate_evaluations",
+        "epsilon_expansions",
+        "matches_emitted",
+        "starts_skipped",
+    )
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def to_openmetrics(
+        self, prefix: str = "reflinkcep", labels: dict[str, str] = None
+    ) -> str:
+        """Render in OpenMetrics text format, labels are added to every sample"""
+        labels = labels or {}
+        lines = []
+        for name in self.COUNTERS:
+            metric = "{}_{}".format(prefix, name)
+            lines.append("# TYPE {} counter".format(metric))
+            lines.append(
+                "{}_total{} {}".format(metric, _labels(labels), getattr(self, name))
+            )
+
+        metric = "{}_matches_pruned".format(prefix)
+        lines.append("# TYPE {} counter".format(metric))
+        for strategy, value in sorted(self.matches_pruned.items()):
+            lines.append(
+                "{}_total{} {}".format(
+                    metric, _labels({**labels, "strategy": strategy}), value
+                )
+            )
+
+        metric = "{}_partial_matches".format(prefix)
+        lines.append("# TYPE {} gauge".format(metric))
+        total = sum(self.partial_matches.values())
+        lines.append("{}{} {}".format(metric, _labels(labels), total))
+        metric = "{}_state_partial_matches".format(prefix)
+        lines.append("# TYPE {} gauge".format(metric))
+        for state, value in sorted(self.partial_matches.items()):
+            lines.append(
+                "{}{} {}".format(metric, _labels({**labels, "state": state}), value)
+            )
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,185 @@
+"""Tracing hooks of the executor.
+
+A tracer is attached to one executor with `Executor.set_tracer`. Without a
+tracer the executor only pays a `tracer is not None` test at each hook site.
+"""
+
+import json
+import logging
+from pathlib import Path
+from time import perf_counter_ns
+
+from reflinkcep.DST import Configuration, Transition
+from reflinkcep.event import Event, Stream
+from reflinkcep.executor import Match
+
+logger = logging.getLogger(__name__)
+
+
+class Tracer:
+    """Structured callbacks of `Executor.feed`, all no-ops by default"""
+
+    def feed_begin(self, event: Event) -> None:
+        pass
+
+    def feed_end(
+        self, event: Event, partial_matches: list[Configuration], out: Stream[Match]
+    ) -> None:
+        pass
+
+    def edge_tried(self, conf: Configuration, edge: Transition, event: Event) -> None:
+        pass
+
+    def edge_fired(
+        self,
+        conf: Configuration,
+        edge: Transition,
+        event: Event,
+        new_conf: Configuration,
+    ) -> None:
+        pass
+
+    def configuration_created(self, conf: Configuration) -> None:
+        pass
+
+    def match_emitted(self, conf: Configuration, match: Match) -> None:
+        pass
+
+    def configuration_pruned(self, conf: Configuration, strategy: str) -> None:
+        pass
+
+    def span_begin(self, name: str) -> None:
+        """Start of a phase of `feed`: "expand" explores the epsilon closure
+        and the edges of one configuration, "find_accepted" searches an
+        accepting configuration after a take, "prune" applies the after-match
+        strategy"""
+        pass
+
+    def span_end(self, name: str) -> None:
+        pass
+
+
+class LoggingTracer(Tracer):
+    """Debug logging of every step, as the executor used to do unconditionally"""
+
+    def __init__(self, logger: logging.Logger = logger, level: int = logging.DEBUG):
+        self.logger = logger
+        self.level = level
+
+    def edge_tried(self, conf: Configuration, edge: Transition, event: Event) -> None:
+        self.logger.log(self.level, "At %d, %s trying edge %s", conf.start, conf, edge)
+
+    def edge_fired(
+        self,
+        conf: Configuration,
+        edge: Transition,
+        event: Event,
+        new_conf: Configuration,
+    ) -> None:
+        if edge.is_epsilon():
+            self.logger.log(self.level, "epsilon to %s with %s", new_conf, edge)
+        else:
+            action = "take" if edge.is_take() else "ignore"
+            self.logger.log(
+                self.level, "%s %s to %s with %s", action, event, new_conf, edge
+            )
+
+    def configuration_created(self, conf: Configuration) -> None:
+        self.logger.log(self.level, "new configuration %s", conf)
+
+    def match_emitted(self, conf: Configuration, match: Match) -> None:
+        self.logger.log(self.level, "accept %d, %s: %s", conf.start, conf, match)
+
+    def configuration_pruned(self, conf: Configuration, strategy: str) -> None:
+        self.logger.log(self.level, "%s prunes %d, %s", strategy, conf.start, conf)
+
+
+class ChromeTraceTracer(Tracer):
+    """Spans of every feed and of its phases (see `Tracer.span_begin`) in the
+    Chrome trace-event JSON format, for chrome://tracing or ui.perfetto.dev.
+
+    At most `buffer_size` trace events are held in memory, they are appended
+    to the file whenever the buffer fills up. Call close() (or use the tracer
+    as a context manager) to flush the rest and terminate the JSON array."""
+
+    def __init__(
+        self, path: Path, buffer_size: int = 10000, name: str = "reflinkcep"
+    ) -> None:
+        self.file = open(path, "w")
+        self.file.write("[\n")
+        self.buffer_size = buffer_size
+        self.buffer: list[dict] = []
+        self.written = 0
+        self.feeds = 0
+        self._origin = perf_counter_ns()
+        self._open: list[tuple[str, float]] = []
+        self._emit(
+            {"name": "process_name", "ph": "M", "pid": 1, "args": {"name": name}}
+        )
+
+    def _now(self) -> float:
+        return (perf_counter_ns() - self._origin) / 1000  # in µs
+
+    def _emit(self, trace_event: dict) -> None:
+        self.buffer.append(trace_event)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def _complete(self, name: str, args: dict = None) -> None:
+        begun, ts = self._open.pop()
+        assert begun == name, "span {} ended inside {}".format(name, begun)
+        trace_event = {
+            "name": name,
+            "cat": "executor",
+            "ph": "X",
+            "ts": ts,
+            "dur": self._now() - ts,
+            "pid": 1,
+            "tid": 1,
+        }
+        if args:
+            trace_event["args"] = args
+        self._emit(trace_event)
+
+    def span_begin(self, name: str) -> None:
+        self._open.append((name, self._now()))
+
+    def span_end(self, name: str) -> None:
+        self._complete(name)
+
+    def feed_begin(self, event: Event) -> None:
+        self.feeds += 1
+        self.span_begin("feed")
+
+    def feed_end(
+        self, event: Event, partial_matches: list[Configuration], out: Stream[Match]
+    ) -> None:
+        args = {
+            "feed": self.feeds,
+            "event": repr(event),
+            "partial_matches": len(partial_matches),
+            "matches": len(out),
+        }
+        self._complete("feed", args)
+
+    def flush(self) -> None:
+        for trace_event in self.buffer:
+            if self.written:
+                self.file.write(",\n")
+            self.file.write(json.dumps(trace_event))
+            self.written += 1
+        self.buffer.clear()
+        self.file.flush()
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.write("\n]\n")
+        self.file.close()
+
+    def __enter__(self) -> "ChromeTraceTracer":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
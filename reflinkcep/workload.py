@@ -0,0 +1,241 @@
+"""Seeded synthetic workloads.
+
+A workload draws an endless, lazy stream of events from a schema: the type
+of each event from `type_weights`, then every attribute from its
+distribution, the "id" attribute being the position in the stream. Target
+conditions get their selectivity by rejection sampling: each event matches
+target i with probability `selectivity_i` and otherwise matches none of the
+targets, so the selectivities are exact for mutually exclusive conditions
+and lower bounds otherwise.
+"""
+
+import argparse
+import random
+from bisect import bisect
+from dataclasses import dataclass, field
+from itertools import accumulate, islice
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from reflinkcep.ast import Query, pattern_nodes
+from reflinkcep.DST import Configuration, Predicte, data_env
+from reflinkcep.event import Event
+from reflinkcep.eventlog import write_event_log, write_jsonl
+
+DEFAULT_DOMAIN = 10
+MAX_REJECTIONS = 1000
+
+
+@dataclass
+class Uniform:
+    """Integers in [low, high)"""
+
+    low: int = 0
+    high: int = DEFAULT_DOMAIN
+
+    def draw(self, rng: random.Random) -> int:
+        return rng.randrange(self.low, self.high)
+
+
+@dataclass
+class Zipf:
+    """Integers in [0, n), value k drawn with weight 1 / (k + 1) ** s"""
+
+    n: int
+    s: float = 1.0
+
+    def __post_init__(self):
+        self.cum_weights = list(
+            accumulate(1 / (k + 1) ** self.s for k in range(self.n))
+        )
+
+    def draw(self, rng: random.Random) -> int:
+        return bisect(self.cum_weights, rng.random() * self.cum_weights[-1])
+
+
+@dataclass
+class Choice:
+    values: list[int]
+    weights: list[float] = None
+
+    def draw(self, rng: random.Random) -> int:
+        return rng.choices(self.values, self.weights)[0]
+
+
+Distribution = Uniform | Zipf | Choice
+
+
+@dataclass
+class Target:
+    """A condition on events of one type, to hold on a selectivity fraction
+    of the stream. Data variables of the condition take their initial values."""
+
+    event: str
+    expr: str
+    selectivity: float
+    variables: dict[str, int] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.predicate = Predicte(self.event, {"expr": self.expr})
+        self.conf = Configuration(None, data_env(self.variables), {})
+
+    def holds(self, event: Event) -> bool:
+        return self.predicate.evaluate(self.conf, event)
+
+
+@dataclass
+class Workload:
+    schema: dict[str, list[str]]
+    seed: int = 0
+    # event type -> relative weight, uniform by default
+    type_weights: dict[str, float] = None
+    # attribute -> distribution, Uniform() by default
+    attributes: dict[str, Distribution] = field(default_factory=dict)
+    targets: list[Target] = field(default_factory=list)
+
+    @staticmethod
+    def for_query(query: Query, selectivity: float = 0.5, seed: int = 0):
+        """Workload of the query schema where a selectivity fraction of the
+        events matches one of the query patterns, in equal shares"""
+        patterns = [ast for _, ast in pattern_nodes(query.patseq)]
+        targets = []
+        for ast in patterns:
+            variables = ast.get("variables", {})
+            targets.append(
+                Target(
+                    ast["event"],
+                    ast["cndt"]["expr"],
+                    selectivity / len(patterns),
+                    dict((k, v["initial"]) for k, v in variables.items()),
+                )
+            )
+        return Workload(query.context["schema"], seed, targets=targets)
+
+    def key(self, attribute: str, cardinality: int, skew: float = 0) -> "Workload":
+        """Draw attribute among `cardinality` keys, Zipf-distributed with
+        exponent skew if skew > 0"""
+        self.attributes[attribute] = (
+            Zipf(cardinality, skew) if skew > 0 else Uniform(0, cardinality)
+        )
+        return self
+
+    def _draw(self, rng: random.Random, ev_type: str, position: int) -> Event:
+        attrs = dict()
+        for name in self.schema[ev_type]:
+            if name == "id":
+                attrs[name] = position
+            else:
+                attrs[name] = self.attributes.get(name, Uniform()).draw(rng)
+        return Event(ev_type, attrs)
+
+    def __iter__(self) -> Iterator[Event]:
+        rng = random.Random(self.seed)
+        types = sorted(self.schema)
+        weights = None
+        if self.type_weights is not None:
+            weights = [self.type_weights.get(t, 0) for t in types]
+        thresholds = list(accumulate(t.selectivity for t in self.targets))
+        assert not thresholds or thresholds[-1] <= 1, "selectivities sum over 1"
+
+        position = 0
+        while True:
+            position += 1
+            # the target to hit, or len(targets) to hit none
+            wanted = bisect(thresholds, rng.random())
+            for _ in range(MAX_REJECTIONS):
+                if wanted < len(self.targets):
+                    target = self.targets[wanted]
+                    event = self._draw(rng, target.event, position)
+                    if target.holds(event):
+                        break
+                else:
+                    ev_type = rng.choices(types, weights)[0]
+                    event = self._draw(rng, ev_type, position)
+                    if not any(t.holds(event) for t in self.targets):
+                        break
+            else:
+                raise ValueError(
+                    "Cannot draw an event {}".format(
+                        "matching " + self.targets[wanted].expr
+                        if wanted < len(self.targets)
+                        else "matching no target"
+                    )
+                )
+            yield event
+
+    def take(self, n: int) -> Iterator[Event]:
+        return islice(self, n)
+
+
+def _parse_key(text: str) -> tuple[str, int, float]:
+    name, _, spec = text.partition("=")
+    cardinality, _, skew = spec.partition(":")
+    return name, int(cardinality), float(skew or 0)
+
+
+def _parse_target(text: str) -> tuple[str, float]:
+    expr, _, selectivity = text.rpartition(":")
+    return expr, float(selectivity)
+
+
+def main(argv: Iterable[str] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m reflinkcep.workload",
+        description="Write a seeded synthetic event stream for a YAML query",
+    )
+    parser.add_argument("query", type=Path, help="YAML query file, for its schema")
+    parser.add_argument("output", type=Path, help=".jsonl, .jsonl.gz or .bin")
+    parser.add_argument("-n", "--events", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "-s",
+        "--selectivity",
+        type=float,
+        default=0.5,
+        help="fraction of events matching a pattern of the query",
+    )
+    parser.add_argument(
+        "--target",
+        type=_parse_target,
+        action="append",
+        metavar="EXPR:SELECTIVITY",
+        help="replaces the query patterns, on events of the first type",
+    )
+    parser.add_argument(
+        "--key",
+        type=_parse_key,
+        action="append",
+        default=[],
+        metavar="ATTR=CARDINALITY[:SKEW]",
+    )
+    parser.add_argument(
+        "--type-weight",
+        action="append",
+        default=[],
+        metavar="TYPE=WEIGHT",
+        help="relative frequency of an event type",
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.query) as f:
+        query = Query.from_yaml(f, args.query.stem)
+    workload = Workload.for_query(query, args.selectivity, args.seed)
+    if args.target:
+        ev_type = sorted(workload.schema)[0]
+        workload.targets = [Target(ev_type, e, s) for e, s in args.target]
+    for name, cardinality, skew in args.key:
+        workload.key(name, cardinality, skew)
+    if args.type_weight:
+        workload.type_weights = dict(
+            (t, float(w)) for t, _, w in (s.partition("=") for s in args.type_weight)
+        )
+
+    events = workload.take(args.events)
+    if args.output.suffix == ".bin":
+        write_event_log(args.output, workload.schema, events)
+    else:
+        write_jsonl(args.output, events)
+
+
+if __name__ == "__main__":
+    main()
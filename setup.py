@@ -9,4 +9,5 @@ setup(
     author_email="fuxd@ios.ac.cn",
     packages=find_packages(),
     install_requires=DEPS,
+    extras_require={"numpy": ["numpy"], "pandas": ["numpy", "pandas"]},
 )
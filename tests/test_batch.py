@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+
+from reflinkcep.ast import EXAMPLE_ASTS_PATH, Query
+from reflinkcep.batch import EventBatch, np, vectorize
+from reflinkcep.DST import Configuration, Predicte, data_env
+from reflinkcep.event import Event
+from reflinkcep.eventlog import EventLog, write_event_log
+from reflinkcep.operator import CEPOperator
+from reflinkcep.workload import Workload
+
+SAMPLES = sorted(p.stem for p in EXAMPLE_ASTS_PATH.glob("*.yml"))
+
+
+class TestVectorize(unittest.TestCase):
+    def test_rejected(self):
+        names = ["name", "price"]
+        self.assertIsNotNone(vectorize("not (name == 1 and 0 < price <= 4)", names))
+        self.assertIsNotNone(vectorize("price if name else -price", names))
+        self.assertIsNone(vectorize("X + price >= 6", names))
+        self.assertIsNone(vectorize("price // 2 == 1", names))
+        self.assertIsNone(vectorize("price * 3 > 1", names))
+        self.assertIsNone(vectorize("abs(price) == 1", names))
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestEventBatch(unittest.TestCase):
+    def test_guards(self):
+        query = Query.from_sample("00-hello")
+        schema = dict(query.context["schema"], f=["name"])
+        events = [
+            Event("e", {"name": 1, "price": 3}),
+            Event("f", {"name": 1}),
+            Event("e", {"name": 1, "price": 5}),
+            Event("g", {}),
+        ]
+        batch = EventBatch.from_events(events, schema)
+        self.assertEqual(batch.type_names, ["e", "f", "g"])
+        self.assertEqual([e.to_event() for e in batch], events)
+        dst = CEPOperator.from_query(query).executor.dst
+        guards = batch.guards(dst)
+        conf = dst.initial_configuration()
+        self.assertIn([True, False, False, False], guards)
+        for edge, guard in zip(dst.edges, guards):
+            if guard is not None:
+                expected = [edge.p.evaluate(conf, e) for e in batch]
+                self.assertEqual(guard, expected, edge.p.cndt)
+
+    def test_guard_semantics(self):
+        schema = {"e": ["name", "price"]}
+        events = [
+            Event("e", {"name": n, "price": p}) for n in (0, 1, 2) for p in (0, 2, 3)
+        ]
+        batch = EventBatch.from_events(events, schema)
+        conf = Configuration(None, data_env({}), {})
+        for expr in (
+            "~(name == 1)",
+            "not (name == 1) and price",
+            "(name == 1) - (price == 2)",
+            "-(name == 1)",
+            "(name == 1) + (price == 2) == 2",
+            "(name or price) == 2",
+            "(name and price) == 3",
+            "(not name) + 1 == 2",
+            "price if name == 1 else -1",
+            "0 < name < 2 <= price",
+            "name + price > 4",
+        ):
+            p = Predicte("e", {"expr": expr})
+            guard = batch.guard(p)
+            self.assertIsNotNone(guard, expr)
+            self.assertEqual(guard, [bool(p.evaluate(conf, e)) for e in batch], expr)
+        # name + name may not fit in int64
+        events.append(Event("e", {"name": 2**62, "price": 0}))
+        batch = EventBatch.from_events(events, schema)
+        self.assertIsNone(batch.guard(Predicte("e", {"expr": "name + name > 0"})))
+        self.assertIsNotNone(batch.guard(Predicte("e", {"expr": "price + 1 > 0"})))
+
+    def test_samples(self):
+        for name in SAMPLES:
+            query = Query.from_sample(name)
+            schema = query.context["schema"]
+            events = list(Workload.for_query(query, 0.5, seed=7).take(12))
+            loaded = CEPOperator.from_query(query) << events
+            batch = EventBatch.from_events(events, schema)
+            batched = CEPOperator.from_query(query) << batch
+            self.assertEqual(repr(batched), repr(loaded), name)
+
+    def test_from_log(self):
+        query = Query.from_sample("lpat-n-m-relaxed")
+        schema = query.context["schema"]
+        events = list(Workload.for_query(query, 0.5).take(300))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "e.bin")
+            write_event_log(path, schema, events)
+            with EventLog(path) as log:
+                batch = EventBatch.from_log(log)
+        operator, plain = CEPOperator.from_query(query), CEPOperator.from_query(query)
+        batched = operator << batch
+        self.assertEqual(repr(batched), repr(plain << events))
+        # vectorized guards are counted, the start prefilter is not
+        self.assertEqual(
+            operator.executor.stats().predicate_evaluations,
+            plain.executor.stats().predicate_evaluations,
+        )
@@ -0,0 +1,77 @@
+import copy
+import json
+import tempfile
+import unittest
+from itertools import islice
+from unittest import mock
+
+from reflinkcep.ast import Query
+from reflinkcep.bench import bench_query, bench_suite, synthetic_stream
+from reflinkcep.bench.compare import compare
+from reflinkcep.bench.store import ResultsStore
+
+
+class TestBench(unittest.TestCase):
+    def test_selectivity(self):
+        query = Query.from_sample("ams-noskip")
+        stream = list(islice(synthetic_stream(query, 0.2, seed=1), 2000))
+        self.assertEqual([e["id"] for e in stream[:3]], [1, 2, 3])
+        matching = sum(1 for e in stream if e["name"] in (2, 3))
+        self.assertAlmostEqual(matching / len(stream), 0.2, delta=0.03)
+        again = list(islice(synthetic_stream(query, 0.2, seed=1), 2000))
+        self.assertEqual([e.attrs for e in again], [e.attrs for e in stream])
+
+    def test_bench_query(self):
+        query = Query.from_sample("lpat-n-m")
+        result = bench_query(query, 500, warmup=1, repeats=2)
+        self.assertEqual(result.events, 500)
+        self.assertEqual(len(result.elapsed_s), 2)
+        self.assertGreater(result.events_per_s, 0)
+        self.assertGreater(result.matches, 0)
+        self.assertGreater(result.peak_partial_matches, 0)
+        self.assertFalse(result.truncated)
+
+    def test_budget_and_report(self):
+        queries = [Query.from_sample("lpat-n-m"), Query.from_sample("cat-relaxed")]
+        report = bench_suite(queries, [100], repeats=1, budget=1e6)
+        report = json.loads(json.dumps(report))
+        self.assertIn("python", report["environment"])
+        ran, skipped = report["results"]
+        self.assertIsNone(ran["skipped"])
+        self.assertIsNotNone(skipped["skipped"])
+        self.assertEqual(skipped["elapsed_s"], [])
+
+    def test_store_order(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ResultsStore(tmp)
+            # saved within the same second, labels in reverse order
+            with mock.patch("time.strftime", return_value="20260101-000000"):
+                runs = [store.save({}, label) for label in ["z", "b", "a", "b"]]
+            self.assertEqual(len(set(runs)), 4)
+            self.assertEqual(store.runs(), runs)
+
+    def test_store_and_compare(self):
+        query = Query.from_sample("lpat-n-m")
+        base = bench_suite([query], [200], repeats=2)
+        self.assertIsNotNone(base["results"][0]["peak_memory_bytes"])
+        base["results"][0]["elapsed_s"] = [1.0, 1.02]
+        head = copy.deepcopy(base)
+        result = head["results"][0]
+        result["events_per_s"] /= 2
+        result["elapsed_s"] = [2.0, 2.04]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ResultsStore(tmp)
+            first = store.save(base, "before")
+            second = store.save(head, "after")
+            self.assertEqual(store.runs(), [first, second])
+            self.assertEqual(store.load(second), head)
+            with self.assertRaises(KeyError):
+                store.load("missing")
+
+        (delta,) = compare(base, head)
+        self.assertAlmostEqual(delta.throughput_delta, -0.5)
+        self.assertEqual(delta.memory_delta, 0)
+        self.assertTrue(delta.regression)
+        (same,) = compare(base, base)
+        self.assertFalse(same.regression)
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from reflinkcep.ast import EXAMPLE_ASTS_PATH, Query
+from reflinkcep.bundle import (
+    BUNDLE_HEADER,
+    BundleError,
+    build_bundle,
+    parse_bundle,
+    read_bundle,
+    write_bundle,
+)
+from reflinkcep.DST import _code_cache
+from reflinkcep.event import Event, EventStream
+from reflinkcep.operator import CEPOperator
+
+
+def ese_from_list(input: list[tuple[int, int]]) -> EventStream:
+    return EventStream(
+        Event("e", {"id": i + 1, "name": n, "price": p})
+        for i, (n, p) in enumerate(input)
+    )
+
+
+SAMPLES = sorted(p.stem for p in EXAMPLE_ASTS_PATH.glob("*.yml"))
+INPUT = [(1, 0), (2, 5), (1, 1), (3, 2), (2, 3), (1, 2), (2, 8), (3, 0)]
+
+
+class TestQueryBundle(unittest.TestCase):
+    def test_roundtrip_all_samples(self):
+        queries = dict((name, Query.from_sample(name)) for name in SAMPLES)
+        executors = parse_bundle(build_bundle(queries))
+        self.assertEqual(sorted(executors.keys()), SAMPLES)
+        for name, query in queries.items():
+            expected = CEPOperator.from_query(query) << ese_from_list(INPUT)
+            output = CEPOperator(executors[name]) << ese_from_list(INPUT)
+            self.assertEqual(str(output), str(expected), name)
+
+    def test_load_without_compiling(self):
+        queries = {"hello": Query.from_sample("00-hello")}
+        data = build_bundle(queries)
+        _code_cache.clear()
+        no_compile = mock.patch(
+            "reflinkcep.DST.compile", side_effect=AssertionError, create=True
+        )
+        with no_compile:
+            executor = parse_bundle(data)["hello"]
+        output = CEPOperator(executor) << ese_from_list([(1, 0), (1, 5)])
+        self.assertEqual(str(output), "[{'a1': [e(1,1,0)]}]")
+
+    def test_file(self):
+        queries = {"cat": Query.from_sample("cat-relaxed")}
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "queries.rlcq")
+            write_bundle(path, queries)
+            executors = read_bundle(path)
+        self.assertEqual(list(executors.keys()), ["cat"])
+
+    def test_reject_garbage(self):
+        with self.assertRaises(BundleError):
+            parse_bundle(b"not a bundle")
+
+    def test_reject_old_version(self):
+        data = build_bundle({"q": Query.from_sample("00-hello")})
+        old = bytearray(data)
+        old[len(BUNDLE_HEADER) - 1] = 1
+        with self.assertRaises(BundleError):
+            parse_bundle(bytes(old))
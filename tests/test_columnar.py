@@ -0,0 +1,60 @@
+import unittest
+
+from reflinkcep.ast import Query
+from reflinkcep.columnar import MatchColumns, matches_to_numpy, np
+from reflinkcep.event import Event, EventBuffer
+from reflinkcep.operator import CEPOperator
+from reflinkcep.workload import Workload
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+SCHEMA = {"a": ["id", "price"], "b": ["id", "key"]}
+MATCHES = [
+    {"x": [Event("a", {"id": 1, "price": 5})], "y": [Event("b", {"id": 2})]},
+    {"x": [Event("a", {"id": 1, "price": 5}), Event("a", {"id": 3, "price": 6})]},
+]
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestColumnar(unittest.TestCase):
+    def test_numpy(self):
+        rows = matches_to_numpy(MATCHES, SCHEMA)
+        self.assertEqual(
+            rows.dtype.names, ("match", "variable", "index", "type", "id", "key", "price")
+        )
+        self.assertEqual(rows["match"].tolist(), [0, 0, 1, 1])
+        self.assertEqual(rows["variable"].tolist(), ["x", "y", "x", "x"])
+        self.assertEqual(rows["index"].tolist(), [0, 0, 0, 1])
+        self.assertEqual(rows["type"].tolist(), ["a", "b", "a", "a"])
+        self.assertEqual(rows["price"].tolist(), [5, 0, 5, 6])
+        self.assertEqual(len(matches_to_numpy([], SCHEMA)), 0)
+
+    def test_positions(self):
+        query = Query.from_sample("lpat-n-m-relaxed")
+        schema = query.context["schema"]
+        events = list(Workload.for_query(query, 0.5, seed=6).take(100))
+        expected = matches_to_numpy(CEPOperator.from_query(query) << events, schema)
+        operator = CEPOperator.from_query(query)
+        buffer = EventBuffer()
+        operator.use_positions(buffer)
+        columns = MatchColumns(schema, buffer)
+        operator.run(events, columns)
+        rows = columns.to_numpy()
+        for name in expected.dtype.names:
+            self.assertEqual(rows[name].tolist(), expected[name].tolist(), name)
+        self.assertEqual(
+            [events[p - 1]["id"] for p in rows["position"]], rows["id"].tolist()
+        )
+
+    @unittest.skipIf(pd is None, "pandas is not installed")
+    def test_dataframe(self):
+        columns = MatchColumns.collect(MATCHES, SCHEMA)
+        frame = columns.to_dataframe()
+        self.assertEqual(list(frame["variable"]), ["x", "y", "x", "x"])
+        self.assertTrue(frame["price"].isna().tolist()[1])
+        self.assertEqual(frame["price"].sum(), 16)
+        columns.append(MATCHES[0])
+        self.assertEqual(len(columns.to_dataframe()), 6)
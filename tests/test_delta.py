@@ -0,0 +1,105 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+from reflinkcep.ast import Query
+from reflinkcep.columnar import MatchColumns
+from reflinkcep.delta import DeltaDecoder, DeltaEncoder
+from reflinkcep.event import Event
+from reflinkcep.operator import CEPOperator
+from reflinkcep.sinks import CsvSink, JsonlSink
+from reflinkcep.workload import Workload
+
+
+class TestDeltaMatches(unittest.TestCase):
+    def setUp(self):
+        self.query = Query.from_sample("lpat-n-inf-relaxed")
+        self.events = list(Workload.for_query(self.query, 0.5, seed=1).take(100))
+        self.expected = CEPOperator.from_query(self.query) << self.events
+
+    def test_roundtrip(self):
+        operator = CEPOperator.from_query(self.query)
+        operator.use_deltas()
+        deltas = operator << self.events
+        decoder = DeltaDecoder()
+        for delta in deltas:
+            decoder.add(delta)
+        self.assertEqual([decoder.expand(d) for d in deltas], self.expected)
+        full = sum(len(evs) for m in self.expected for evs in m.values())
+        appended = sum(len(evs) for d in deltas for evs in d.appended.values())
+        self.assertLess(appended * 10, full)
+        # ids restart with every run
+        self.assertEqual((operator << self.events)[0].id, 0)
+
+    def test_encoder(self):
+        e1, e2, e3 = (Event("e", {"id": i}) for i in range(3))
+        encoder = DeltaEncoder(capacity=1)
+        first = encoder.encode({"a": [e1]}, 1)
+        self.assertEqual((first.id, first.base), (0, None))
+        second = encoder.encode({"a": [e1, e2], "b": [e3]}, 1)
+        self.assertEqual((second.base, second.appended), (0, {"a": [e2], "b": [e3]}))
+        # a different branch of the same start does not extend it
+        self.assertIsNone(encoder.encode({"a": [e1, e3]}, 1).base)
+        # start 1 is forgotten once start 2 has matched
+        encoder.encode({"a": [e2]}, 2)
+        self.assertIsNone(encoder.encode({"a": [e1, e3, e2]}, 1).base)
+        # events are the same objects, not merely equal ones
+        encoder.encode({"a": [e1]}, 3)
+        copy = Event("e", {"id": 0})
+        self.assertIsNone(encoder.encode({"a": [copy, e2]}, 3).base)
+        # positions compare by value
+        encoder.encode({"a": [1000, 1001]}, 4)
+        delta = encoder.encode({"a": [1000, 1001, 1002]}, 4)
+        self.assertEqual(delta.appended, {"a": [1002]})
+
+        decoder = DeltaDecoder(capacity=1)
+        decoder.add(first)
+        decoder.add(second)
+        with self.assertRaises(KeyError):
+            decoder.expand(second)
+
+    def test_jsonl(self):
+        operator = CEPOperator.from_query(self.query)
+        operator.use_deltas()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "m.jsonl")
+            with JsonlSink(path) as sink:
+                operator.run(self.events, sink)
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), len(self.expected))
+        self.assertIsNone(records[0]["base"])
+        self.assertTrue(any(r["base"] is not None for r in records))
+
+    def test_csv(self):
+        operator = CEPOperator.from_query(self.query)
+        operator.use_deltas()
+        schema = self.query.context["schema"]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "m.csv")
+            with CsvSink(path, schema) as sink:
+                operator.run(self.events, sink)
+            with open(path) as f:
+                rows = list(csv.DictReader(f))
+        deltas = CEPOperator.from_query(self.query)
+        deltas.use_deltas()
+        appended = [
+            (str(d.id), "" if d.base is None else str(d.base), e["price"])
+            for d in deltas << self.events
+            for evs in d.appended.values()
+            for e in evs
+        ]
+        self.assertEqual(
+            [(r["match_id"], r["match_base"], int(r["price"])) for r in rows], appended
+        )
+
+    def test_columns_reject_deltas(self):
+        operator = CEPOperator.from_query(self.query)
+        operator.use_deltas()
+        columns = MatchColumns(self.query.context["schema"])
+        with self.assertRaises(ValueError):
+            operator.run(self.events, columns)
+        with self.assertRaises(ValueError):
+            columns.append((operator << self.events)[0])
@@ -0,0 +1,79 @@
+import unittest
+
+from reflinkcep.ast import EXAMPLE_ASTS_PATH, Query
+from reflinkcep.bundle import build_bundle, parse_bundle
+from reflinkcep.compile import compile
+from reflinkcep.event import Event
+from reflinkcep.operator import CEPOperator
+from reflinkcep.workload import Workload
+
+SAMPLES = sorted(p.stem for p in EXAMPLE_ASTS_PATH.glob("*.yml"))
+
+
+class TestDSTLayout(unittest.TestCase):
+    def test_dense_ids(self):
+        for name in SAMPLES:
+            dst = compile(Query.from_sample(name)).dst
+            self.assertEqual([q.id for q in dst.states], list(range(len(dst.Q))))
+            self.assertEqual(dst.q0.id, 0)
+            self.assertEqual([e.id for e in dst.edges], list(range(len(dst.Delta))))
+            for q in dst.states:
+                for edge in dst.start_from(q):
+                    self.assertIs(edge.q1, q)
+
+    def test_deterministic_compile(self):
+        for name in SAMPLES:
+            first = compile(Query.from_sample(name)).dst._print_trans_map()
+            second = compile(Query.from_sample(name)).dst._print_trans_map()
+            self.assertEqual(first, second, name)
+
+    def test_bundle_keeps_ids(self):
+        queries = dict((name, Query.from_sample(name)) for name in SAMPLES)
+        executors = parse_bundle(build_bundle(queries))
+        for name, query in queries.items():
+            self.assertEqual(
+                executors[name].dst._print_trans_map(),
+                compile(query).dst._print_trans_map(),
+                name,
+            )
+
+    def test_configuration_record(self):
+        executor = compile(Query.from_sample("lpat-n-m-relaxed"))
+        executor.reset()
+        conf = executor.dst.initial_configuration(7)
+        self.assertFalse(hasattr(conf, "__dict__"))
+        self.assertTrue(conf.once_epsilon_from(executor.dst.q0))
+        self.assertEqual(conf.start, 7)
+
+    def test_idle_loop_carries_configuration(self):
+        executor = compile(Query.from_sample("lpat-n-m-ndrelaxed"))
+        executor.reset()
+        executor.feed(Event("e", {"id": 1, "name": 1, "price": 0}))
+        noise = Event("e", {"id": 2, "name": 5, "price": 0})
+        executor.feed(noise)
+        (waiting,) = [c for c in executor.S if "ig" in c.q.label]
+        executor.feed(noise)
+        self.assertTrue(any(c is waiting for c in executor.S))
+
+    def test_start_set(self):
+        executor = compile(Query.from_sample("00-hello"))
+        dst = executor.dst
+        self.assertTrue(dst.start_exact)
+        self.assertTrue(dst.may_start(Event("e", {"name": 1, "price": 3})))
+        self.assertFalse(dst.may_start(Event("e", {"name": 2, "price": 3})))
+        self.assertFalse(dst.may_start(Event("f", {})))
+        executor.reset()
+        executor.feed(Event("e", {"name": 2, "price": 3}))
+        self.assertEqual(executor.stats().starts_skipped, 1)
+
+    def test_start_set_keeps_matches(self):
+        for name in SAMPLES:
+            query = Query.from_sample(name)
+            events = list(Workload.for_query(query, 0.5, seed=3).take(12))
+            unfiltered = CEPOperator.from_query(query)
+            unfiltered.executor.dst.start_edges = None
+            self.assertEqual(
+                repr(CEPOperator.from_query(query) << events),
+                repr(unfiltered << events),
+                name,
+            )
@@ -0,0 +1,65 @@
+import sys
+import tracemalloc
+import unittest
+
+from reflinkcep.DST import ConditionEvaluator, DataUpdate, data_env
+from reflinkcep.event import CompactEvent, Event, EventSchema
+from reflinkcep.workload import Workload
+
+SCHEMA = {"a": ["id", "name", "price"], "b": ["id", "key"]}
+
+
+class TestCompactEvent(unittest.TestCase):
+    def setUp(self):
+        self.schema = EventSchema(SCHEMA)
+
+    def test_mapping(self):
+        event = self.schema.event("a", {"price": 3, "id": 1, "extra": 9})
+        self.assertEqual(event.values, (1, None, 3))
+        self.assertEqual(dict(event.attrs), {"id": 1, "price": 3})
+        self.assertEqual(event["price"], 3)
+        with self.assertRaises(KeyError):
+            event["name"]
+        self.assertEqual(repr(event), "a(1,3)")
+        self.assertEqual(event, Event("a", {"id": 1, "price": 3}))
+        self.assertEqual(event.to_event(), Event("a", {"id": 1, "price": 3}))
+
+        unknown = self.schema.event("c", {"id": 1})
+        self.assertEqual(len(unknown), 0)
+        self.assertIs(unknown.type, sys.intern("c"))
+        with self.assertRaises(ValueError):
+            self.schema.make("b", (1,))
+
+    def test_shared_layout(self):
+        e1, e2 = self.schema.make("b", (1, 2)), self.schema.make("b", (1, 2))
+        self.assertIs(e1.type, e2.type)
+        self.assertIs(e1._index, e2._index)
+        self.assertEqual(e1, e2)
+        self.assertNotEqual(e1, self.schema.make("b", (1, 3)))
+
+    def test_evaluation(self):
+        event = self.schema.make("a", (1, 2, 3))
+        evaluator = ConditionEvaluator({"expr": "price > x and name == 2"})
+        self.assertTrue(evaluator.eval(data_env({"x": 2}), event.attrs))
+        update = DataUpdate({"x": "x + price", "y": "x", "z": "abs(-x)"})
+        eta = update.update(data_env({"x": 1, "y": 0, "z": 0}), event)
+        # data updates keep builtins, the environment still hides them
+        self.assertEqual(eta, data_env({"x": 4, "y": 1, "z": 1}))
+        with self.assertRaises(TypeError):
+            ConditionEvaluator({"expr": "abs(x) > 0"}).eval(eta, event.attrs)
+
+    def test_memory(self):
+        events = list(Workload(SCHEMA, seed=1).take(2000))
+
+        def retained(convert):
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            kept = [convert(e) for e in events]
+            size = tracemalloc.get_traced_memory()[0] - before
+            tracemalloc.stop()
+            del kept
+            return size
+
+        plain = retained(lambda e: Event(e.type, dict(e.attrs)))
+        compact = retained(self.schema.compact)
+        self.assertLess(compact * 2, plain)
@@ -0,0 +1,107 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from reflinkcep.ast import Query
+from reflinkcep.event import Event, EventSchema
+from reflinkcep.eventlog import (
+    EventLog,
+    EventLogError,
+    read_event_log,
+    write_event_log,
+    write_jsonl,
+)
+from reflinkcep.operator import CEPOperator
+from reflinkcep.workload import Workload, main
+
+SCHEMA = {"a": ["id", "name", "price"], "b": ["id", "key"]}
+
+
+class TestEventLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp.name, name)
+
+    def test_binary_roundtrip(self):
+        events = list(Workload(SCHEMA, seed=3).take(10000))
+        events.append(Event("a", {"id": -1, "name": 2**40, "price": -(2**40)}))
+        self.assertEqual(write_event_log(self.path("e.bin"), SCHEMA, events), 10001)
+        decoded = list(read_event_log(self.path("e.bin")))
+        self.assertEqual(
+            [(e.type, e.attrs) for e in decoded], [(e.type, e.attrs) for e in events]
+        )
+
+    def test_mapped_log(self):
+        events = list(Workload(SCHEMA, seed=5).take(1000))
+        write_event_log(self.path("e.bin"), SCHEMA, events)
+        with EventLog(self.path("e.bin")) as log:
+            self.assertEqual(len(log), 1000)
+            self.assertEqual(
+                [(v.type, dict(v.attrs)) for v in log],
+                [(e.type, e.attrs) for e in events],
+            )
+            view = log[-1]
+            self.assertIs(view.attrs, view)
+            self.assertEqual(view["id"], events[-1]["id"])
+            self.assertEqual(repr(view), repr(events[-1]))
+            self.assertEqual(len(log[10:20]), 10)
+            with self.assertRaises(IndexError):
+                log[1000]
+            self.assertEqual(view, events[-1])
+            self.assertEqual(events[-1], view)
+            self.assertEqual(view, log[-1])
+            other = next(i for i, e in enumerate(events) if e != events[-1])
+            self.assertNotEqual(view, log[other])
+            self.assertNotEqual(view, Event("c", dict(events[-1].attrs)))
+            compact = EventSchema(SCHEMA).compact(events[-1])
+            self.assertEqual(compact, view)
+            self.assertEqual(view, compact)
+            kept = view.to_event()
+        self.assertEqual(kept.attrs, events[-1].attrs)
+        with self.assertRaises(ValueError):
+            view["id"]
+
+    def test_mapped_log_matching(self):
+        query = Query.from_sample("lpat-n-m-relaxed")
+        schema = query.context["schema"]
+        events = list(Workload.for_query(query, 0.5).take(300))
+        write_event_log(self.path("e.bin"), schema, events)
+        loaded = CEPOperator.from_query(query) << events
+        with EventLog(self.path("e.bin")) as log:
+            mapped = CEPOperator.from_query(query) << log
+            self.assertEqual(repr(mapped), repr(loaded))
+
+    def test_not_a_log(self):
+        with open(self.path("e.bin"), "wb") as f:
+            f.write(b"garbage" * 10)
+        with self.assertRaises(EventLogError):
+            list(read_event_log(self.path("e.bin")))
+
+        write_event_log(self.path("t.bin"), SCHEMA, Workload(SCHEMA).take(3))
+        with open(self.path("t.bin"), "r+b") as f:
+            f.truncate(os.path.getsize(self.path("t.bin")) - 1)
+        with self.assertRaises(EventLogError):
+            list(read_event_log(self.path("t.bin")))
+        with self.assertRaises(EventLogError):
+            EventLog(self.path("t.bin"))
+
+    def test_jsonl(self):
+        events = list(Workload(SCHEMA).take(5))
+        write_jsonl(self.path("e.jsonl.gz"), events)
+        with gzip.open(self.path("e.jsonl.gz"), "rt") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(records[0], {"type": events[0].type, "attrs": events[0].attrs})
+
+    def test_cli(self):
+        query = os.path.join(
+            os.path.dirname(__file__), "..", "example-patseq-asts", "lpat-n-m.yml"
+        )
+        main([query, self.path("w.bin"), "-n", "100", "--key", "name=3"])
+        events = list(read_event_log(self.path("w.bin")))
+        self.assertEqual(len(events), 100)
+        self.assertLessEqual(set(e["name"] for e in events), {0, 1, 2})
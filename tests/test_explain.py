@@ -0,0 +1,54 @@
+import unittest
+import warnings
+
+from reflinkcep.ast import Query
+from reflinkcep.event import Event, EventStream
+from reflinkcep.explain import (
+    EXPONENTIAL,
+    Growth,
+    QueryCostError,
+    QueryCostWarning,
+    explain,
+)
+
+
+def ese_from_list(input: list[tuple[int, int]]) -> EventStream:
+    return EventStream(
+        Event("e", {"id": i + 1, "name": n, "price": p})
+        for i, (n, p) in enumerate(input)
+    )
+
+
+class TestExplain(unittest.TestCase):
+    def test_growth_classes(self):
+        strict = explain(Query.from_sample("lpat-n-m"))
+        self.assertFalse(strict.waits)
+        self.assertEqual(strict.growth, Growth(0))
+        self.assertEqual(strict.states, 7)
+
+        relaxed = explain(Query.from_sample("lpat-n-m-relaxed"))
+        self.assertTrue(relaxed.waits)
+        self.assertEqual(relaxed.growth, Growth(1))
+
+        ndrelaxed = explain(Query.from_sample("lpat-n-m-ndrelaxed"))
+        self.assertEqual(ndrelaxed.growth, Growth(3))
+        exponential = explain(Query.from_sample("lpat-n-inf-ndrelaxed"))
+        self.assertEqual(exponential.growth, EXPONENTIAL)
+        self.assertIn("O(2^N)", str(explain(Query.from_sample("cat-relaxed"))))
+
+    def test_calibration(self):
+        query = Query.from_sample("lpat-n-m-ndrelaxed")
+        sample = ese_from_list([(1, 0), (2, 0), (2, 0), (2, 9)])
+        calibrated = explain(query, sample=sample)
+        self.assertEqual(calibrated.nodes[0].selectivity, 0.25)
+        self.assertLess(calibrated.estimate, explain(query).estimate)
+
+    def test_budget(self):
+        query = Query.from_sample("lpat-n-inf-ndrelaxed")
+        with self.assertRaises(QueryCostError):
+            explain(query, budget=1e6, refuse=True)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            explain(query, budget=1e6)
+            explain(Query.from_sample("lpat-n-m"), budget=1e6)
+        self.assertEqual([w.category for w in caught], [QueryCostWarning])
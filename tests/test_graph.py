@@ -0,0 +1,40 @@
+import unittest
+
+from reflinkcep.ast import Query
+from reflinkcep.compile import compile
+from reflinkcep.event import Event, EventStream
+from reflinkcep.graph import HitCountTracer, to_dot
+from reflinkcep.operator import CEPOperator
+
+
+def ese_from_list(input: list[tuple[int, int]]) -> EventStream:
+    return EventStream(
+        Event("e", {"id": i + 1, "name": n, "price": p})
+        for i, (n, p) in enumerate(input)
+    )
+
+
+class TestGraphExport(unittest.TestCase):
+    def test_plain(self):
+        dst = compile(Query.from_sample("cat-relaxed")).dst
+        dot = to_dot(dst, name="cat-relaxed")
+        self.assertTrue(dot.startswith('digraph "cat-relaxed" {'))
+        self.assertEqual(dot.count(" -> q"), len(dst.edges) + 1)
+        self.assertIn("doublecircle", dot)
+        self.assertIn('label="ε", style=dotted', dot)
+        self.assertNotIn("×", dot)
+
+    def test_hit_counts(self):
+        operator = CEPOperator.from_query(Query.from_sample("ams-noskip"))
+        dst = operator.executor.dst
+        tracer = HitCountTracer(dst)
+        operator.executor.set_tracer(tracer)
+        operator << ese_from_list([(2, 0), (2, 1), (2, 2), (3, 0)])
+        stats = operator.executor.stats()
+        self.assertEqual(sum(tracer.edge_hits), stats.edges_fired)
+        self.assertEqual(max(tracer.state_peaks), 6)
+
+        dot = to_dot(dst, tracer.edge_hits, tracer.state_peaks)
+        self.assertIn("×0", dot)
+        self.assertIn("peak 6", dot)
+        self.assertIn('fillcolor="#ff0000"', dot)
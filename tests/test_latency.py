@@ -0,0 +1,58 @@
+import json
+import os
+import tempfile
+import unittest
+
+from reflinkcep.ast import Query
+from reflinkcep.event import Event, EventStream
+from reflinkcep.latency import LatencyHistogram
+from reflinkcep.operator import CEPOperator
+
+
+def ese_from_list(input: list[tuple[int, int]]) -> EventStream:
+    return EventStream(
+        Event("e", {"id": i + 1, "name": n, "price": p})
+        for i, (n, p) in enumerate(input)
+    )
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_quantiles(self):
+        histogram = LatencyHistogram()
+        for ns in range(1, 10001):
+            histogram.record(ns * 1000)
+        self.assertEqual(histogram.count, 10000)
+        for q in [0.5, 0.99, 0.999]:
+            exact = q * 10000 * 1000
+            self.assertLess(abs(histogram.quantile(q) - exact) / exact, 0.13)
+        self.assertEqual(histogram.quantile(1), 10000 * 1000)
+
+    def test_fixed_memory(self):
+        histogram = LatencyHistogram()
+        size = len(histogram.counts)
+        for ns in [0, 1, 7, 8, 1 << 20, 1 << 45]:
+            histogram.record(ns)
+        self.assertEqual(len(histogram.counts), size)
+        self.assertEqual(histogram.max_ns, 1 << 45)
+
+
+class TestOperatorLatency(unittest.TestCase):
+    def test_slow_events(self):
+        query = Query.from_sample("ams-noskip")
+        operator = CEPOperator.from_query(query)
+        recorder = operator.record_latency(slow_ms=0, capacity=2, history=3)
+        operator << ese_from_list([(2, 0), (2, 1), (2, 2), (3, 0)])
+        self.assertEqual(recorder.histogram.count, 4)
+        self.assertEqual([s.position for s in recorder.slow_events], [3, 4])
+        last = recorder.slow_events[-1]
+        self.assertEqual(len(last.history), 3)
+        self.assertEqual(last.matches, 6)
+        self.assertEqual(last.partial_matches_before, 6)
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "slow.jsonl")
+            recorder.dump_slow_events(path, operator.query)
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual(records[-1]["event"]["attrs"]["name"], 3)
+        self.assertEqual(records[-1]["query"]["patseq"]["type"], "combine")
@@ -0,0 +1,79 @@
+import sys
+import tracemalloc
+import unittest
+
+from reflinkcep.ast import Query
+from reflinkcep.event import Event, EventSchema, EventStream
+from reflinkcep.memory import CATEGORIES, _sizeof, memory_report
+from reflinkcep.operator import CEPOperator
+from reflinkcep.trace import Tracer
+
+
+def ese_from_list(input: list[tuple[int, int]]) -> EventStream:
+    return EventStream(
+        Event("e", {"id": i + 1, "name": n, "price": p})
+        for i, (n, p) in enumerate(input)
+    )
+
+
+class ReportingTracer(Tracer):
+    def __init__(self, operator: CEPOperator) -> None:
+        self.operator = operator
+        self.reports = []
+
+    def feed_end(self, event, partial_matches, out):
+        self.reports.append(memory_report(self.operator))
+
+
+class TestMemoryReport(unittest.TestCase):
+    def test_breakdown(self):
+        operator = CEPOperator.from_query(Query.from_sample("lpat-n-m-relaxed"))
+        self.assertEqual(memory_report(operator).total, 0)
+
+        tracer = ReportingTracer(operator)
+        operator.executor.set_tracer(tracer)
+        output = operator << ese_from_list([(1, 0), (3, 0), (1, 1), (1, 2)])
+        self.assertGreater(len(output), 0)
+
+        report = tracer.reports[-1]
+        self.assertEqual(set(report.categories), set(CATEGORIES))
+        for name in ("configurations", "contexts", "events", "data_envs", "output"):
+            self.assertGreater(report.categories[name], 0, name)
+        self.assertEqual(
+            report.partial_matches, operator.executor.stats().partial_matches
+        )
+        self.assertLessEqual(sum(report.state_bytes.values()), report.total)
+        self.assertIsNone(report.traced)
+        # the output belongs to the caller once << returns
+        self.assertEqual(memory_report(operator).categories["output"], 0)
+
+    def test_shared_events_counted_once(self):
+        operator = CEPOperator.from_query(Query.from_sample("lpat-n-m-ndrelaxed"))
+        operator << ese_from_list([(1, 0), (1, 0), (1, 0)])
+        events = memory_report(operator.executor).categories["events"]
+        # every partial match holds some of the 3 events, sized once each
+        self.assertLessEqual(events, 3 * _sizeof(ese_from_list([(1, 0)])[0], set()))
+
+    def test_slots(self):
+        schema = EventSchema({"a": ["id", "name"]})
+        event = schema.make("a", (10**30, 10**40))
+        seen: set[int] = set()
+        size = _sizeof(event, seen)
+        self.assertIn(id(event.values), seen)
+        values = sum(sys.getsizeof(v) for v in event.values)
+        self.assertGreaterEqual(
+            size, sys.getsizeof(event) + sys.getsizeof(event.values) + values
+        )
+
+    def test_traced(self):
+        tracemalloc.start()
+        try:
+            operator = CEPOperator.from_query(Query.from_sample("lpat-n-m-relaxed"))
+            operator << ese_from_list([(1, 0), (3, 0), (1, 1)])
+            report = memory_report(operator, traced=3)
+        finally:
+            tracemalloc.stop()
+        self.assertIsNotNone(report.traced)
+        self.assertLessEqual(len(report.traced), 3)
+        self.assertIn("traced allocations", str(report))
+
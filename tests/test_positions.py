@@ -0,0 +1,51 @@
+import unittest
+
+from reflinkcep.ast import Query
+from reflinkcep.event import EventBuffer
+from reflinkcep.memory import memory_report
+from reflinkcep.operator import CEPOperator
+from reflinkcep.workload import Workload
+
+
+class TestPositionMatches(unittest.TestCase):
+    def setUp(self):
+        self.query = Query.from_sample("lpat-n-m-relaxed")
+        self.events = list(Workload.for_query(self.query, 0.5, seed=4).take(200))
+        self.expected = CEPOperator.from_query(self.query) << self.events
+
+    def test_positions(self):
+        operator = CEPOperator.from_query(self.query)
+        operator.use_positions()
+        output = operator << self.events
+        self.assertEqual(len(output), len(self.expected))
+        for match, expected in zip(output, self.expected):
+            self.assertEqual(
+                dict((k, [self.events[p - 1] for p in v]) for k, v in match.items()),
+                expected,
+            )
+
+    def test_resolve(self):
+        operator = CEPOperator.from_query(self.query)
+        buffer = EventBuffer()
+        operator.use_positions(buffer)
+        output = operator << self.events
+        self.assertEqual([buffer.resolve(m) for m in output], self.expected)
+        self.assertGreater(memory_report(operator).categories["events"], 0)
+        # a second run starts again from position 1
+        output = operator << self.events[:50]
+        self.assertEqual(len(buffer), 50)
+        self.assertEqual(
+            [buffer.resolve(m) for m in output],
+            CEPOperator.from_query(self.query) << self.events[:50],
+        )
+
+    def test_bounded_buffer(self):
+        buffer = EventBuffer(2)
+        for event in self.events[:5]:
+            buffer.append(event)
+        self.assertIs(buffer[5], self.events[4])
+        self.assertIs(buffer[4], self.events[3])
+        with self.assertRaises(KeyError):
+            buffer[3]
+        with self.assertRaises(KeyError):
+            buffer[6]
@@ -0,0 +1,45 @@
+import unittest
+
+from reflinkcep.ast import Query, ast_at
+from reflinkcep.bundle import build_bundle, parse_bundle
+from reflinkcep.compile import compile
+from reflinkcep.event import Event, EventStream
+from reflinkcep.profiling import profile_query
+
+
+def ese_from_list(input: list[tuple[int, int]]) -> EventStream:
+    return EventStream(
+        Event("e", {"id": i + 1, "name": n, "price": p})
+        for i, (n, p) in enumerate(input)
+    )
+
+
+class TestCostAttribution(unittest.TestCase):
+    def test_origins(self):
+        query = Query.from_sample("gpat-loop-times")
+        dst = compile(query).dst
+        origins = set(edge.origin for edge in dst.edges)
+        self.assertIn("$", origins)
+        self.assertIn("$.child[2].right", origins)
+        for origin in origins:
+            ast_at(query.patseq, origin)
+        self.assertEqual(ast_at(query.patseq, "$.child[1].left")["name"], "a")
+
+    def test_bundle_keeps_origins(self):
+        query = Query.from_sample("cat-relaxed")
+        executor = parse_bundle(build_bundle({"q": query}))["q"]
+        self.assertEqual(
+            [edge.origin for edge in executor.dst.edges],
+            [edge.origin for edge in compile(query).dst.edges],
+        )
+
+    def test_report(self):
+        query = Query.from_sample("cat-relaxed")
+        output, report = profile_query(
+            query, ese_from_list([(1, 0), (1, 1), (3, 0), (2, 0), (2, 1)])
+        )
+        self.assertEqual(len(output), 6)
+        lines = report.splitlines()
+        self.assertEqual(lines[0], repr(query))
+        self.assertTrue(any(line.startswith("$.right ") for line in lines))
+        self.assertIn("b:e:[name == 2]_∘{1,3}", report)
@@ -0,0 +1,85 @@
+import gzip
+import lzma
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from reflinkcep.ast import Query
+from reflinkcep.event import CompactEvent, Event
+from reflinkcep.eventlog import write_jsonl
+from reflinkcep.operator import CEPOperator
+from reflinkcep.readers import read_csv, read_events, read_jsonl
+from reflinkcep.workload import Workload
+
+SCHEMA = {"e": ["id", "name", "price"]}
+CSV = "type,id,name,price,extra\ne,1,1,0,9\ne,2,2,5,9\nf,3,,1,9\ne,4,1,0,\n"
+
+
+class TestReaders(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp.name, name)
+
+    def test_jsonl(self):
+        events = list(Workload({"e": ["id", "name", "price", "extra"]}).take(1000))
+        for name in ("e.jsonl", "e.jsonl.gz", "e.jsonl.xz"):
+            write_jsonl(self.path(name), events)
+            # small chunks split lines between reads
+            decoded = list(read_jsonl(self.path(name), SCHEMA, chunk_size=7))
+            self.assertEqual(len(decoded), 1000)
+            self.assertIsInstance(decoded[5], CompactEvent)
+            self.assertEqual(decoded[5].attrs, dict(list(events[5].attrs.items())[:3]))
+        raw = next(read_jsonl(self.path("e.jsonl")))
+        self.assertEqual(raw.attrs, events[0].attrs)
+
+    def test_csv(self):
+        with open(self.path("e.csv"), "w") as f:
+            f.write(CSV)
+        with gzip.open(self.path("e.csv.gz"), "wt") as f:
+            f.write(CSV)
+        for name in ("e.csv", "e.csv.gz"):
+            events = list(read_events(self.path(name), SCHEMA))
+            self.assertEqual([e.type for e in events], ["e", "e", "f", "e"])
+            self.assertEqual(events[1].attrs, {"id": 2, "name": 2, "price": 5})
+            self.assertEqual(events[2].attrs, {})
+        raw = list(read_csv(self.path("e.csv")))
+        self.assertEqual(raw[0].attrs, {"id": 1, "name": 1, "price": 0, "extra": 9})
+        self.assertEqual(raw[2].attrs, {"id": 3, "price": 1, "extra": 9})
+
+    def test_operator_input(self):
+        query = Query.from_sample("lpat-n-m-relaxed")
+        events = list(Workload.for_query(query, 0.5).take(300))
+        write_jsonl(self.path("e.jsonl.xz"), events)
+        streamed = CEPOperator.from_query(query) << read_events(
+            self.path("e.jsonl.xz"), query.context["schema"]
+        )
+        loaded = CEPOperator.from_query(query) << events
+        self.assertEqual(repr(streamed), repr(loaded))
+
+    def test_follow(self):
+        path = self.path("grow.jsonl")
+        write_jsonl(path, [Event("e", {"id": 1, "name": 1, "price": 0})])
+
+        def append():
+            time.sleep(0.05)
+            with open(path, "a") as f:
+                f.write('{"type": "e", "attrs": {"id": 2, ')
+                f.flush()
+                time.sleep(0.05)
+                f.write('"name": 2, "price": 0}}\n')
+
+        writer = threading.Thread(target=append)
+        writer.start()
+        events = list(read_jsonl(path, follow=True, poll=0.01, idle_timeout=0.3))
+        writer.join()
+        self.assertEqual([e["id"] for e in events], [1, 2])
+
+        with lzma.open(self.path("e.jsonl.xz"), "wt") as f:
+            f.write("")
+        with self.assertRaises(ValueError):
+            list(read_jsonl(self.path("e.jsonl.xz"), follow=True))
@@ -0,0 +1,122 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+from reflinkcep.ast import Query
+from reflinkcep.event import EventBuffer
+from reflinkcep.operator import CEPOperator
+from reflinkcep.readers import read_csv
+from reflinkcep.sinks import (
+    CallbackSink,
+    CsvSink,
+    JsonlSink,
+    MatchSink,
+    RingBufferSink,
+    _FileSink,
+)
+from reflinkcep.workload import Workload
+
+
+class TestSinks(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.query = Query.from_sample("lpat-n-m-relaxed")
+        self.events = list(Workload.for_query(self.query, 0.5, seed=2).take(200))
+        self.expected = CEPOperator.from_query(self.query) << self.events
+        self.assertGreater(len(self.expected), 10)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp.name, name)
+
+    def test_callback_and_ring_buffer(self):
+        seen = []
+        ring = RingBufferSink(5)
+        count = CEPOperator.from_query(self.query).run(
+            self.events, CallbackSink(lambda i, m: seen.append(m)), ring
+        )
+        self.assertEqual(count, len(self.expected))
+        self.assertEqual(repr(seen), repr(self.expected))
+        self.assertEqual(ring.count, count)
+        self.assertEqual(repr(ring.matches()), repr(self.expected[-5:]))
+
+    def test_abstract(self):
+        class Incomplete(MatchSink):
+            pass
+
+        class Unserialized(_FileSink):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+        with self.assertRaises(TypeError):
+            Unserialized(self.path("m.txt"))
+        self.assertFalse(os.path.exists(self.path("m.txt")))
+
+    def test_jsonl(self):
+        with JsonlSink(self.path("m.jsonl.gz"), batch_size=3) as sink:
+            CEPOperator.from_query(self.query).run(self.events, sink)
+        with JsonlSink(self.path("m.jsonl")) as sink:
+            CEPOperator.from_query(self.query).run(self.events, sink)
+            # flushed once the run is over
+            with open(self.path("m.jsonl")) as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual([r["id"] for r in records], list(range(len(self.expected))))
+        first = self.expected[0]
+        self.assertEqual(
+            records[0]["match"],
+            dict(
+                (name, [{"type": e.type, "attrs": e.attrs} for e in events])
+                for name, events in first.items()
+            ),
+        )
+        self.assertGreater(records[-1]["position"], records[0]["position"])
+
+    def test_csv(self):
+        schema = self.query.context["schema"]
+        with CsvSink(self.path("m.csv"), schema, batch_size=1) as sink:
+            CEPOperator.from_query(self.query).run(self.events, sink)
+        with open(self.path("m.csv")) as f:
+            self.assertEqual(
+                f.readline(),
+                "match_id,match_position,match_base,match_pattern,"
+                "event_position,type,{}\n".format(",".join(sorted(schema["e"]))),
+            )
+        events = list(read_csv(self.path("m.csv"), schema))
+        self.assertEqual(
+            [e.to_event() for e in events],
+            [e for match in self.expected for evs in match.values() for e in evs],
+        )
+        with self.assertRaises(ValueError):
+            CsvSink(self.path("t.csv"), {"e": ["id", "match_id"]})
+
+    def test_csv_positions(self):
+        schema = self.query.context["schema"]
+        operator = CEPOperator.from_query(self.query)
+        buffer = EventBuffer()
+        operator.use_positions(buffer)
+        with CsvSink(self.path("m.csv"), schema, events=buffer) as sink:
+            operator.run(self.events, sink)
+        events = list(read_csv(self.path("m.csv"), schema))
+        self.assertEqual(
+            [e.to_event() for e in events],
+            [e for match in self.expected for evs in match.values() for e in evs],
+        )
+
+        operator.use_positions()
+        with CsvSink(self.path("p.csv"), schema) as sink:
+            operator.run(self.events, sink)
+        with open(self.path("p.csv")) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(
+            [int(row["event_position"]) for row in rows],
+            [
+                self.events.index(e) + 1
+                for match in self.expected
+                for evs in match.values()
+                for e in evs
+            ],
+        )
+        self.assertEqual(set(row["type"] for row in rows), {""})
@@ -0,0 +1,66 @@
+import unittest
+
+from reflinkcep.ast import Query
+from reflinkcep.event import Event, EventStream
+from reflinkcep.executor import Executor
+from reflinkcep.operator import CEPOperator
+
+
+def ese_from_list(input: list[tuple[int, int]]) -> EventStream:
+    return EventStream(
+        Event("e", {"id": i + 1, "name": n, "price": p})
+        for i, (n, p) in enumerate(input)
+    )
+
+
+INPUT = [(2, 0), (2, 1), (2, 2), (3, 0)]
+
+
+class TestExecutorStats(unittest.TestCase):
+    def test_counters(self):
+        operator = CEPOperator.from_query(Query.from_sample("ams-skiptonext"))
+        output = operator << ese_from_list(INPUT)
+        stats = operator.executor.stats()
+        self.assertEqual(stats.events_fed, len(INPUT))
+        self.assertEqual(stats.matches_emitted, len(output))
+        self.assertGreater(stats.edges_tried, stats.edges_fired)
+        self.assertGreater(stats.predicate_evaluations, 0)
+        self.assertGreater(stats.epsilon_expansions, 0)
+        self.assertGreater(stats.matches_pruned["SkipToNext"], 0)
+
+    def test_shared_dst(self):
+        alone = CEPOperator.from_query(Query.from_sample("ams-noskip"))
+        alone << ese_from_list(INPUT)
+        expected = alone.executor.stats().predicate_evaluations
+        operator = CEPOperator.from_query(Query.from_sample("ams-noskip"))
+        executor = operator.executor
+        other = CEPOperator(Executor(executor.dst, executor.strategy))
+        operator << ese_from_list(INPUT)
+        other << ese_from_list(INPUT)
+        self.assertEqual(executor.stats().predicate_evaluations, expected)
+        self.assertEqual(other.executor.stats().predicate_evaluations, expected)
+
+    def test_live_partial_matches(self):
+        operator = CEPOperator.from_query(Query.from_sample("ams-noskip"))
+        operator << ese_from_list(INPUT[:3])
+        stats = operator.executor.stats()
+        self.assertEqual(sum(stats.partial_matches.values()), len(operator.executor.S))
+        self.assertGreater(len(stats.partial_matches), 0)
+
+    def test_reset_stats(self):
+        operator = CEPOperator.from_query(Query.from_sample("ams-noskip"))
+        operator << ese_from_list(INPUT)
+        operator.executor.reset_stats()
+        stats = operator.executor.stats()
+        self.assertEqual(stats.events_fed, 0)
+        self.assertEqual(stats.predicate_evaluations, 0)
+
+    def test_export(self):
+        operator = CEPOperator.from_query(Query.from_sample("ams-skiptonext"))
+        operator << ese_from_list(INPUT)
+        stats = operator.executor.stats()
+        self.assertEqual(stats.to_dict()["events_fed"], len(INPUT))
+        text = stats.to_openmetrics(labels={"query": "ams"})
+        self.assertIn('reflinkcep_events_fed_total{query="ams"} 4\n', text)
+        self.assertIn('strategy="SkipToNext"', text)
+        self.assertTrue(text.endswith("# EOF\n"))
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import unittest
+from collections import Counter
+
+from reflinkcep.ast import Query
+from reflinkcep.event import Event, EventStream
+from reflinkcep.operator import CEPOperator
+from reflinkcep.trace import ChromeTraceTracer, Tracer
+
+
+def ese_from_list(input: list[tuple[int, int]]) -> EventStream:
+    return EventStream(
+        Event("e", {"id": i + 1, "name": n, "price": p})
+        for i, (n, p) in enumerate(input)
+    )
+
+
+class RecordingTracer(Tracer):
+    def __init__(self):
+        self.calls = Counter()
+        self.pruned = Counter()
+
+    def edge_tried(self, conf, edge, event):
+        self.calls["tried"] += 1
+
+    def edge_fired(self, conf, edge, event, new_conf):
+        self.calls["fired"] += 1
+
+    def configuration_created(self, conf):
+        self.calls["created"] += 1
+
+    def match_emitted(self, conf, match):
+        self.calls["emitted"] += 1
+
+    def configuration_pruned(self, conf, strategy):
+        self.pruned[strategy] += 1
+
+
+INPUT = [(2, 0), (2, 1), (2, 2), (3, 0)]
+
+
+class TestTracer(unittest.TestCase):
+    def run_traced(self, sample: str):
+        operator = CEPOperator.from_query(Query.from_sample(sample))
+        tracer = RecordingTracer()
+        operator.executor.set_tracer(tracer)
+        output = operator << ese_from_list(INPUT)
+        return tracer, output
+
+    def test_callbacks(self):
+        tracer, output = self.run_traced("ams-noskip")
+        self.assertEqual(tracer.calls["emitted"], len(output))
+        self.assertGreaterEqual(tracer.calls["tried"], tracer.calls["fired"])
+        self.assertGreater(tracer.calls["created"], len(INPUT))
+        self.assertEqual(sum(tracer.pruned.values()), 0)
+
+    def test_pruned(self):
+        tracer, _ = self.run_traced("ams-skippastlastevent")
+        self.assertGreater(tracer.pruned["SkipPastLastEvent"], 0)
+        tracer, _ = self.run_traced("ams-skiptonext")
+        self.assertGreater(tracer.pruned["SkipToNext"], 0)
+
+    def test_detached(self):
+        operator = CEPOperator.from_query(Query.from_sample("ams-noskip"))
+        tracer = RecordingTracer()
+        operator.executor.set_tracer(tracer)
+        operator.executor.set_tracer(None)
+        operator << ese_from_list(INPUT)
+        self.assertEqual(sum(tracer.calls.values()), 0)
+
+    def test_chrome_trace(self):
+        operator = CEPOperator.from_query(Query.from_sample("ams-skiptonext"))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            with ChromeTraceTracer(path, buffer_size=4) as tracer:
+                operator.executor.set_tracer(tracer)
+                output = operator << ese_from_list(INPUT)
+                self.assertLess(len(tracer.buffer), 4)
+            with open(path) as f:
+                trace_events = json.load(f)
+
+        spans = Counter(e["name"] for e in trace_events if e["ph"] == "X")
+        self.assertEqual(spans["feed"], len(INPUT))
+        self.assertGreaterEqual(spans["expand"], len(INPUT))
+        self.assertGreater(spans["find_accepted"], 0)
+        self.assertGreater(spans["prune"], 0)
+        feeds = [e for e in trace_events if e["name"] == "feed"]
+        self.assertEqual(sum(e["args"]["matches"] for e in feeds), len(output))
+        for e in trace_events:
+            if e["ph"] == "X":
+                self.assertGreaterEqual(e["dur"], 0)
@@ -0,0 +1,52 @@
+import unittest
+from collections import Counter
+
+from reflinkcep.ast import Query
+from reflinkcep.workload import Target, Workload, Zipf
+
+SCHEMA = {"a": ["id", "name", "price"], "b": ["id", "key"]}
+
+
+class TestWorkload(unittest.TestCase):
+    def test_deterministic_and_lazy(self):
+        workload = Workload(SCHEMA, seed=7)
+        first = [(e.type, e.attrs) for e in workload.take(500)]
+        again = [(e.type, e.attrs) for e in workload.take(500)]
+        self.assertEqual(first, again)
+        self.assertEqual([attrs["id"] for _, attrs in first[:3]], [1, 2, 3])
+        other = [(e.type, e.attrs) for e in Workload(SCHEMA, seed=8).take(500)]
+        self.assertNotEqual(first, other)
+        # endless, only what is taken gets drawn
+        self.assertEqual(sum(1 for _ in Workload(SCHEMA).take(10**5)), 10**5)
+
+    def test_type_weights_and_keys(self):
+        workload = Workload(SCHEMA, type_weights={"a": 3, "b": 1}).key("key", 5)
+        events = list(workload.take(4000))
+        types = Counter(e.type for e in events)
+        self.assertAlmostEqual(types["a"] / len(events), 0.75, delta=0.03)
+        keys = set(e["key"] for e in events if e.type == "b")
+        self.assertEqual(keys, set(range(5)))
+
+        skewed = Workload(SCHEMA).key("name", 100, skew=1.5)
+        names = Counter(e["name"] for e in skewed.take(4000) if e.type == "a")
+        self.assertEqual(names.most_common(1)[0][0], 0)
+
+    def test_selectivity(self):
+        targets = [Target("a", "price > 7", 0.3), Target("b", "key == 1", 0.1)]
+        events = list(Workload(SCHEMA, seed=1, targets=targets).take(5000))
+        high = sum(1 for e in events if e.type == "a" and e["price"] > 7)
+        ones = sum(1 for e in events if e.type == "b" and e["key"] == 1)
+        self.assertAlmostEqual(high / len(events), 0.3, delta=0.03)
+        self.assertAlmostEqual(ones / len(events), 0.1, delta=0.02)
+
+        with self.assertRaises(ValueError):
+            next(iter(Workload(SCHEMA, targets=[Target("a", "price > 99", 1)])))
+
+    def test_for_query(self):
+        query = Query.from_sample("lpat-n-m-ic")
+        events = list(Workload.for_query(query, 0.4).take(2000))
+        self.assertEqual(set(events[0].attrs), set(query.context["schema"]["e"]))
+
+    def test_zipf_range(self):
+        zipf = Zipf(3)
+        self.assertEqual(len(zipf.cum_weights), 3)
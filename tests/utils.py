@@ -7,6 +7,7 @@ from reflinkcep.compile import compile
 from reflinkcep.event import Event, EventStream
 from reflinkcep.executor import MatchStream, Match
 from reflinkcep.operator import CEPOperator
+from reflinkcep.trace import LoggingTracer
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=os.environ.get("LOGLEVEL", "WARNING").upper())
@@ -76,6 +77,8 @@ def run_query_raw(query: Query, input: EventStream) -> MatchStream:
             operator.executor.dst.q0,
             operator.executor.dst._print_trans_map(),
         )
+        if logger.isEnabledFor(logging.DEBUG):
+            operator.executor.set_tracer(LoggingTracer())
         output = operator << input
         elapsed_ms = sw.elapsed_ms()
     TestRecorder.log(query, input, output, elapsed_ms)